@@ -0,0 +1,44 @@
+"""Dataset analytics computed once at upload time.
+
+The statistics payload served by ``get_dataset`` is persisted on the
+``Dataset`` row together with ``ANALYTICS_VERSION``. Uploads and appends
+build it with ``analytics_from_stats`` from the sufficient statistics merged
+chunk by chunk during ingestion: min/max/mean/std/count are exact, and so
+are the quantiles of columns with up to ``stats.EXACT_QUANTILE_LIMIT``
+values (larger ones are sketch estimates, see ``api.stats``).
+``compute_analytics`` builds the same payload from a loaded frame through
+the same statistics, so both return the same values for the same rows; rows
+stored with an older version are recomputed with it lazily on first access.
+"""
+from .columns import NUMERIC_COLUMNS
+from .stats import column_quantile, compute_stats, std
+
+ANALYTICS_VERSION = 2
+ANALYTICS_COLUMNS = ['Type'] + NUMERIC_COLUMNS
+QUANTILES = {'p25': 0.25, 'p50': 0.5, 'p75': 0.75, 'p95': 0.95}
+
+
+def compute_analytics(df):
+    return analytics_from_stats(compute_stats(df))
+
+
+def analytics_from_stats(stats):
+    statistics = {}
+    for col in NUMERIC_COLUMNS:
+        column = stats['columns'][col]
+        statistics[f'{col.lower()}_stats'] = {
+            'min': column['min'],
+            'max': column['max'],
+            'mean': column['mean'] if column['count'] else None,
+            'std': std(column),
+            'count': column['count'],
+            'quantiles': {
+                label: column_quantile(column, q) for label, q in QUANTILES.items()
+            },
+        }
+
+    type_counts = sorted(stats['type_counts'].items(), key=lambda item: item[1], reverse=True)
+    return {
+        'type_distribution': dict(type_counts),
+        'statistics': statistics,
+    }
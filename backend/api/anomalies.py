@@ -0,0 +1,96 @@
+"""Per-type anomaly detection.
+
+Each numeric value is compared with a robust baseline for its equipment
+type: the median, and the median absolute deviation (MAD) scaled to a
+standard deviation. Both come from groupbys over the Type codes, which are
+factorized once. A type whose MAD is zero falls back to the mean absolute
+deviation. The z-score ``(x - median) / sigma`` flags values beyond the
+threshold (3.5 by default, after Iglewicz and Hoaglin). A row's score is its
+largest absolute z-score.
+
+``detect`` keeps only the flagged rows, ordered by score, so the result
+stays small enough to cache even for multi-million-row datasets.
+"""
+import numpy as np
+import pandas as pd
+
+from .columns import NUMERIC_COLUMNS
+
+MAD_TO_SIGMA = 1.4826  # 1 / Phi^-1(3/4), for normally distributed values
+MEAN_AD_TO_SIGMA = 1.2533  # sqrt(pi / 2)
+
+
+def detect(df, threshold):
+    """Score the ``Type`` and numeric columns of ``df`` against per-type baselines."""
+    codes, types = pd.factorize(df['Type'], use_na_sentinel=False)
+    values = df[NUMERIC_COLUMNS].to_numpy(dtype=float)
+    group_range = np.arange(len(types))
+
+    medians = pd.DataFrame(values).groupby(codes).median().reindex(group_range).to_numpy()
+    deviations = np.abs(values - medians[codes])
+    grouped = pd.DataFrame(deviations).groupby(codes)
+    mad = grouped.median().reindex(group_range).to_numpy()
+    mean_ad = grouped.mean().reindex(group_range).to_numpy()
+    sigma = np.where(mad > 0, MAD_TO_SIGMA * mad, MEAN_AD_TO_SIGMA * mean_ad)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = (values - medians[codes]) / sigma[codes]
+    # Missing values and types without any spread are never flagged
+    z[~np.isfinite(z)] = 0.0
+    scores = np.abs(z).max(axis=1)
+
+    flagged = np.flatnonzero(scores > threshold)
+    order = flagged[np.argsort(-scores[flagged], kind='stable')]
+    flagged_codes = codes[order]
+    return {
+        'threshold': threshold,
+        'total_count': len(df),
+        'types': [str(t) for t in types],
+        'type_counts': np.bincount(codes, minlength=len(types)),
+        'medians': medians,
+        'mad': mad,
+        'positions': order,
+        'scores': scores[order],
+        'z': z[order],
+        'anomaly_counts': np.bincount(flagged_codes, minlength=len(types)),
+    }
+
+
+def _clean(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def baselines(result):
+    return {
+        eq_type: {
+            'count': int(result['type_counts'][code]),
+            'anomalies': int(result['anomaly_counts'][code]),
+            **{
+                col: {
+                    'median': _clean(result['medians'][code, i]),
+                    'mad': _clean(result['mad'][code, i]),
+                }
+                for i, col in enumerate(NUMERIC_COLUMNS)
+            },
+        }
+        for code, eq_type in enumerate(result['types'])
+    }
+
+
+def anomaly_rows(result, start, stop, rows):
+    """Describe flagged rows ``start:stop``; ``rows`` holds their stored values in that order."""
+    threshold = result['threshold']
+    items = []
+    for i, (_, row) in zip(range(start, stop), rows.iterrows()):
+        z = result['z'][i]
+        items.append({
+            'index': int(result['positions'][i]),
+            'Equipment Name': row['Equipment Name'],
+            'Type': row['Type'],
+            'score': float(result['scores'][i]),
+            'values': {col: _clean(row[col]) for col in NUMERIC_COLUMNS},
+            'z_scores': {col: float(z[j]) for j, col in enumerate(NUMERIC_COLUMNS)},
+            'flagged': [col for j, col in enumerate(NUMERIC_COLUMNS) if abs(z[j]) > threshold],
+        })
+    return items
@@ -2,4 +2,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'api'
\ No newline at end of file
+    name = 'api'
+
+    def ready(self):
+        from . import authentication  # noqa: F401  (connects the token cache signals)
+        from . import jobs  # noqa: F401  (deletes job result files with their jobs)
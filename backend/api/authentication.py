@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _cache():
+    # Shared by every worker process, so a revoked token is dropped everywhere
+    return caches['auth']
+
+
+def token_cache_key(key):
+    return f'auth-token:{key}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that keeps resolved tokens in the Django cache.
+
+    A cache hit authenticates a request without a database query or a
+    password hash. Entries are dropped when the token is deleted (logout) and
+    when its user is deactivated or deleted; ``AUTH_TOKEN_CACHE_TIMEOUT``
+    bounds anything changed outside the ORM.
+    """
+
+    def authenticate_credentials(self, key):
+        cache = _cache()
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, (user, token), settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        return user, token
+
+
+def invalidate_token(key):
+    _cache().delete(token_cache_key(key))
+
+
+@receiver(post_delete, sender=Token)
+def _token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, **kwargs):
+    # Cached entries hold a copy of the user; drop them on any change
+    # (deactivation, password change) so the next request reloads it
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_token(key)
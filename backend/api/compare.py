@@ -0,0 +1,127 @@
+"""Comparing snapshots of the same fleet for /api/compare/.
+
+Each dataset is reduced to one row per ``Equipment Name`` (the mean of its
+rows) from just the name and numeric columns. Two snapshots are joined with
+a hash lookup of one name index in the other (``Index.get_indexer``), so
+everything stays in NumPy arrays. Datasets are compared in the order
+given, each with the previous one, and only the first, previous and
+current snapshots are held in memory at any time.
+"""
+import numpy as np
+import pandas as pd
+
+from .columns import NUMERIC_COLUMNS
+
+NAME_COLUMN = 'Equipment Name'
+
+
+class Snapshot:
+    """Per-equipment parameter means of one dataset."""
+
+    def __init__(self, dataset_id, df):
+        codes, names = pd.factorize(df[NAME_COLUMN])
+        self.dataset_id = dataset_id
+        self.names = pd.Index(names)
+        self.values = (
+            df[NUMERIC_COLUMNS].astype(float).groupby(codes).mean()
+            .reindex(np.arange(len(names))).to_numpy()
+        )
+
+
+class Join:
+    """Equipment present in both snapshots, with their values side by side."""
+
+    def __init__(self, before, after):
+        positions = before.names.get_indexer(after.names)
+        matched = np.flatnonzero(positions >= 0)
+        self.before = before
+        self.after = after
+        self.names = after.names[matched]
+        self.from_values = before.values[positions[matched]]
+        self.to_values = after.values[matched]
+        self.delta = self.to_values - self.from_values
+        self.added = len(after.names) - len(matched)
+        self.removed = len(before.names) - len(matched)
+
+    def top_movers(self, column, top):
+        """The ``top`` largest absolute changes of one parameter, largest first."""
+        delta = self.delta[:, column]
+        candidates = np.flatnonzero(~np.isnan(delta))
+        if len(candidates) > top:
+            magnitude = np.abs(delta[candidates])
+            candidates = candidates[np.argpartition(-magnitude, top - 1)[:top]]
+        order = candidates[np.argsort(-np.abs(delta[candidates]), kind='stable')]
+        return [
+            {
+                NAME_COLUMN: str(self.names[i]),
+                'from': _clean(self.from_values[i, column]),
+                'to': _clean(self.to_values[i, column]),
+                'delta': _clean(delta[i]),
+            }
+            for i in order
+        ]
+
+    def summary(self, top):
+        return {
+            'from': self.before.dataset_id,
+            'to': self.after.dataset_id,
+            'matched': len(self.names),
+            'added': self.added,
+            'removed': self.removed,
+            'mean_delta': {
+                col: _clean(np.nanmean(self.delta[:, i])) if _has_values(self.delta[:, i]) else None
+                for i, col in enumerate(NUMERIC_COLUMNS)
+            },
+            'top_movers': {col: self.top_movers(i, top) for i, col in enumerate(NUMERIC_COLUMNS)},
+        }
+
+    def page(self, offset, limit):
+        """Per-equipment values and deltas as one array per parameter."""
+        stop = min(offset + limit, len(self.names))
+        rows = slice(offset, stop)
+        return {
+            'from': self.before.dataset_id,
+            'to': self.after.dataset_id,
+            'count': len(self.names),
+            'offset': offset,
+            'limit': limit,
+            'next_offset': stop if stop < len(self.names) else None,
+            'names': [str(name) for name in self.names[rows]],
+            'from_values': {col: self.from_values[rows, i] for i, col in enumerate(NUMERIC_COLUMNS)},
+            'to_values': {col: self.to_values[rows, i] for i, col in enumerate(NUMERIC_COLUMNS)},
+            'delta': {col: self.delta[rows, i] for i, col in enumerate(NUMERIC_COLUMNS)},
+        }
+
+
+def _has_values(values):
+    return bool((~np.isnan(values)).any())
+
+
+def _clean(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def compare(datasets, top, offset, limit):
+    """Compare ``datasets`` in order; ``deltas`` pages the first-to-last join."""
+    first = previous = None
+    comparisons = []
+    overall = None
+    for dataset in datasets:
+        current = Snapshot(dataset.id, dataset.load_frame([NAME_COLUMN] + NUMERIC_COLUMNS))
+        if previous is not None:
+            join = Join(previous, current)
+            comparisons.append(join.summary(top))
+            overall = join
+        if first is None:
+            first = current
+        previous = current
+    if len(comparisons) > 1:
+        overall = Join(first, previous)
+    return {
+        'ids': [dataset.id for dataset in datasets],
+        'parameters': NUMERIC_COLUMNS,
+        'comparisons': comparisons,
+        'overall': overall.summary(top) if len(comparisons) > 1 else comparisons[0],
+        'deltas': overall.page(offset, limit),
+    }
@@ -0,0 +1,245 @@
+"""Creating and pruning datasets, shared by the upload view and the job worker.
+
+Parsed storage is content-addressed: a ``DatasetBlob`` is keyed by the
+SHA-256 of the uploaded bytes and reference-counted, so re-uploading the same
+file only creates a ``Dataset`` row pointing at the existing blob. Appending
+rows to a dataset whose blob is shared first copies the blob (copy-on-write).
+"""
+import json
+import uuid
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from . import ingest, reports, storage
+from .analytics import analytics_from_stats
+from .columns import NUMERIC_COLUMNS
+from .ingest import IngestError
+from .models import Dataset, DatasetBlob
+from .profiling import span
+from .response_cache import invalidate_user
+from .stats import compute_stats, merge_stats
+
+
+def find_blob(sha256):
+    """Return a live blob for ``sha256``, or None when the bytes are new."""
+    if not sha256:
+        return None
+    return DatasetBlob.objects.filter(sha256=sha256, refcount__gt=0).first()
+
+
+def create_from_blob(user, name, blob):
+    """Create a dataset that reuses the parsed storage and statistics of ``blob``.
+
+    Returns None when the blob is being released meanwhile, so the caller
+    ingests the file itself.
+    """
+    with transaction.atomic():
+        # Lock the blob and take the reference before anything else, so
+        # release_blobs cannot delete it under the new dataset
+        blob = DatasetBlob.objects.select_for_update().filter(pk=blob.pk, refcount__gt=0).first()
+        if blob is None or not DatasetBlob.objects.filter(pk=blob.pk, refcount__gt=0).update(
+            refcount=F('refcount') + 1
+        ):
+            return None
+        source = Dataset.objects.filter(blob=blob).first()
+        if source is None:
+            # Rolls back the reference taken above
+            transaction.set_rollback(True)
+            return None
+        dataset = Dataset.objects.create(
+            user=user,
+            name=name,
+            blob=blob,
+            summary=source.summary,
+            analytics=source.analytics,
+            analytics_version=source.analytics_version,
+            stats=source.stats
+        )
+    prune_history(user)
+    return dataset
+
+
+def create_dataset(user, name, file, sha256=None):
+    """Ingest ``file`` (a path or file object) as a new dataset for ``user``.
+
+    When a blob with the same ``sha256`` already exists the file is not parsed.
+    """
+    blob = find_blob(sha256)
+    if blob is not None:
+        dataset = create_from_blob(user, name, blob)
+        if dataset is not None:
+            return dataset
+
+    with span('parse'):
+        storage_key, running = ingest.ingest_csv(file)
+    try:
+        # Statistics were merged chunk by chunk during ingestion; the stored
+        # rows are not read back
+        with span('stats'):
+            dataset = Dataset(
+                user=user,
+                name=name,
+                summary=json.dumps(running.as_dict()),
+                stats=json.dumps(running.stats)
+            )
+            dataset.set_analytics(analytics_from_stats(running.stats))
+        try:
+            _save_dataset(dataset, storage_key, sha256)
+        except IntegrityError:
+            # Another upload of the same bytes finished first; share its blob
+            blob = DatasetBlob.objects.filter(sha256=sha256).first()
+            shared = create_from_blob(user, name, blob) if blob is not None else None
+            if shared is not None:
+                storage.delete(storage_key)
+                return shared
+            # That blob is being released (no dataset uses it any more), so
+            # keep the rows parsed here under a blob without a hash
+            _save_dataset(dataset, storage_key, None)
+    except Exception:
+        storage.delete(storage_key)
+        raise
+    prune_history(user)
+    return dataset
+
+
+def _save_dataset(dataset, storage_key, sha256):
+    with transaction.atomic():
+        dataset.blob = DatasetBlob.objects.create(sha256=sha256, storage_key=storage_key, refcount=1)
+        dataset.save()
+
+
+def _appended_summary(summary, added_rows, stats):
+    columns = stats['columns']
+    summary = dict(summary)
+    summary['total_count'] += added_rows
+    for col in NUMERIC_COLUMNS:
+        summary[f'avg_{col.lower()}'] = columns[col]['mean'] if columns[col]['count'] else None
+    summary['type_distribution'] = dict(
+        sorted(stats['type_counts'].items(), key=lambda item: item[1], reverse=True)
+    )
+    return summary
+
+
+def append_rows(dataset, file):
+    """Append the rows of ``file`` to ``dataset`` in O(new rows).
+
+    Only the new rows are parsed; the summary, statistics and analytics are
+    updated by merging their statistics into the stored ones. Parsing writes
+    the parts under a staging key; appends to the same dataset are then
+    serialized while the parts are moved in and the manifest is rewritten.
+    """
+    columns = dataset.get_columns()
+    staging = storage.StorageWriter()
+    prefix = f'append-{uuid.uuid4().hex[:8]}'
+    added = None
+    added_rows = 0
+    try:
+        with span('parse'):
+            for chunk in ingest.iter_chunks(file):
+                missing = [col for col in columns if col not in chunk.columns]
+                if missing:
+                    raise IngestError(f"Missing columns: {', '.join(missing)}")
+                chunk = chunk[columns]
+                chunk_stats = compute_stats(chunk)
+                added = chunk_stats if added is None else merge_stats(added, chunk_stats)
+                staging.write_part(chunk, f'{prefix}-{len(staging.parts):05d}')
+                added_rows += len(chunk)
+        # A header-only CSV still yields one empty chunk (and part)
+        if not added_rows:
+            raise IngestError('No rows in file')
+        dataset = _commit_append(dataset, staging, added, added_rows)
+    finally:
+        # Empty once the parts were moved into the dataset
+        staging.abort()
+
+    invalidate_user(dataset.user_id)
+    reports.delete_reports([dataset.pk])
+    return dataset
+
+
+def _commit_append(dataset, staging, added, added_rows):
+    with transaction.atomic():
+        # select_for_update does nothing on SQLite, but a write takes its
+        # database lock (and the row lock on PostgreSQL) until commit, so
+        # concurrent appends to this dataset run one at a time
+        Dataset.objects.filter(pk=dataset.pk).update(name=F('name'))
+        dataset = Dataset.objects.get(pk=dataset.pk)
+        blob = dataset.blob = DatasetBlob.objects.select_for_update().get(pk=dataset.blob_id)
+        shared = blob.refcount > 1
+        key = storage.fork(blob.storage_key) if shared else blob.storage_key
+        # Read under the lock, so parts committed by an earlier append are kept
+        manifest = storage.read_manifest(key)
+        parts = storage.move_parts(staging.key, key, staging.parts)
+        try:
+            with span('stats'):
+                merged = merge_stats(dataset.get_stats(), added)
+                dataset.summary = json.dumps(_appended_summary(dataset.get_summary(), added_rows, merged))
+                dataset.stats = json.dumps(merged)
+                dataset.set_analytics(analytics_from_stats(merged))
+
+            if shared:
+                DatasetBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                dataset.blob = DatasetBlob.objects.create(storage_key=key, refcount=1)
+            elif blob.sha256:
+                # The rows no longer match the uploaded bytes
+                blob.sha256 = None
+                blob.save(update_fields=['sha256'])
+            dataset.save(update_fields=['blob', 'summary', 'stats', 'analytics', 'analytics_version'])
+            storage.write_manifest(key, manifest['columns'], manifest['parts'] + parts)
+        except Exception:
+            if shared:
+                storage.delete(key)
+            else:
+                storage.write_manifest(key, manifest['columns'], manifest['parts'])
+                storage.delete_parts(key, parts)
+            raise
+    return dataset
+
+
+def release_blobs(blob_ids):
+    """Drop one reference from each blob and delete storage nobody references."""
+    for blob_id in blob_ids:
+        DatasetBlob.objects.filter(pk=blob_id).update(refcount=F('refcount') - 1)
+    for blob in DatasetBlob.objects.filter(pk__in=blob_ids, refcount__lte=0):
+        blob.delete()
+        storage.delete(blob.storage_key)
+
+
+def prune_history(user):
+    """Keep only the last ``HISTORY_LIMIT`` datasets for ``user``.
+
+    Called after every new dataset, so it also invalidates the user's cached
+    responses.
+    """
+    invalidate_user(user.id)
+    stale = _delete_stale(user)
+    if stale:
+        release_blobs([blob_id for _, blob_id in stale])
+        reports.delete_reports([pk for pk, _ in stale])
+
+
+def _delete_stale(user):
+    """Delete the datasets of ``user`` past the history limit; return their ``(pk, blob_id)``."""
+    keep = Dataset.objects.filter(user=user).values('pk')[:settings.HISTORY_LIMIT]
+    # PostgreSQL, and SQLite from 3.35 (the release that added RETURNING),
+    # delete the tail and return it in one statement
+    if connection.vendor == 'postgresql' or (
+        connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
+    ):
+        quote = connection.ops.quote_name
+        keep_sql, keep_params = keep.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {quote(Dataset._meta.db_table)} '
+                f'WHERE {quote("user_id")} = %s AND {quote("id")} NOT IN ({keep_sql}) '
+                f'RETURNING {quote("id")}, {quote("blob_id")}',
+                [user.pk, *keep_params]
+            )
+            return cursor.fetchall()
+    # Elsewhere: one indexed query for the (usually empty) tail, then one delete
+    stale = list(Dataset.objects.filter(user=user).values_list('pk', 'blob_id')[settings.HISTORY_LIMIT:])
+    if stale:
+        Dataset.objects.filter(pk__in=[pk for pk, _ in stale]).delete()
+    return stale
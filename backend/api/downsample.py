@@ -0,0 +1,42 @@
+"""Vectorized downsampling of parameter series for trend charts.
+
+``minmax_indices`` splits a series into equal buckets and keeps the position
+of the minimum and maximum of every bucket, which preserves the visual
+envelope of the line at a fraction of the points.
+"""
+import numpy as np
+
+
+def minmax_indices(values, points):
+    """Return sorted positions of at most ``points`` samples of ``values``."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n <= points:
+        return np.arange(n)
+
+    buckets = max(1, points // 2)
+    size = -(-n // buckets)  # ceil(n / buckets)
+    padding = buckets * size - n
+
+    # NaNs and padding must never win the min/max comparison
+    low = np.concatenate([np.where(np.isnan(values), np.inf, values), np.full(padding, np.inf)])
+    high = np.concatenate([np.where(np.isnan(values), -np.inf, values), np.full(padding, -np.inf)])
+    offsets = np.arange(buckets) * size
+    argmin = low.reshape(buckets, size).argmin(axis=1) + offsets
+    argmax = high.reshape(buckets, size).argmax(axis=1) + offsets
+
+    indices = np.unique(np.concatenate([argmin, argmax]))
+    return indices[indices < n]
+
+
+def downsample_frame(df, columns, points):
+    series = {}
+    for col in columns:
+        values = df[col].to_numpy(dtype=float)
+        indices = minmax_indices(values, points)
+        sampled = values[indices]
+        series[col] = {
+            'index': indices.tolist(),
+            'values': [None if np.isnan(v) else float(v) for v in sampled],
+        }
+    return series
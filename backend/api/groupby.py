@@ -0,0 +1,58 @@
+"""Grouped parameter statistics for /api/dataset/<id>/groupby/.
+
+The key column is factorized once and every requested metric is computed
+from the same pandas groupby over the integer codes. Results are
+columnar: one array per (field, metric) with one entry per group, ordered
+by group size.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+AGGREGATES = ('count', 'sum', 'mean', 'std', 'var', 'min', 'max', 'median')
+PERCENTILE = re.compile(r'p(100|\d{1,2}(\.\d+)?)')
+DEFAULT_METRICS = ['count', 'mean', 'std', 'min', 'max']
+
+
+def parse_metrics(text):
+    """Split ``mean,p95,std`` into metric names; raises ValueError on unknown ones."""
+    metrics = [m.strip() for m in text.split(',') if m.strip()] if text else DEFAULT_METRICS
+    unknown = [m for m in metrics if m not in AGGREGATES and not PERCENTILE.fullmatch(m)]
+    if unknown:
+        raise ValueError(f'Unknown metrics: {", ".join(unknown)}')
+    return list(dict.fromkeys(metrics))
+
+
+def group_stats(df, by, fields, metrics):
+    codes, keys = pd.factorize(df[by], use_na_sentinel=False)
+    grouped = df[fields].astype(float).groupby(codes)
+    sizes = np.bincount(codes, minlength=len(keys))
+    order = np.argsort(-sizes, kind='stable')
+    group_range = np.arange(len(keys))
+
+    values = {field: {} for field in fields}
+    aggregates = [m for m in metrics if m in AGGREGATES]
+    if aggregates:
+        table = grouped.agg(aggregates).reindex(group_range)
+        for field in fields:
+            for metric in aggregates:
+                values[field][metric] = table[(field, metric)].to_numpy()[order]
+    percentiles = [m for m in metrics if m not in AGGREGATES]
+    if percentiles:
+        quantiles = [float(m[1:]) / 100 for m in percentiles]
+        table = grouped.quantile(quantiles)
+        for field in fields:
+            # (code, q) rows -> one column per q, in the requested order
+            by_q = table[field].unstack().reindex(index=group_range, columns=quantiles).to_numpy(dtype=float)
+            for i, metric in enumerate(percentiles):
+                values[field][metric] = by_q[order, i]
+
+    return {
+        'by': by,
+        'fields': fields,
+        'metrics': metrics,
+        'groups': [None if pd.isna(key) else str(key) for key in keys[order]],
+        'rows': sizes[order],
+        'values': {field: {m: values[field][m] for m in metrics} for field in fields},
+    }
@@ -0,0 +1,217 @@
+"""Chunked CSV ingestion.
+
+Uploads are read with ``pd.read_csv(chunksize=...)`` so that peak memory is
+bounded by the chunk size rather than the file size. Each chunk is written to
+columnar storage as its own part while a ``RunningSummary`` accumulates the
+statistics that ``upload_csv`` reports and the mergeable sufficient
+statistics (``api.stats``) of every chunk, so the stored rows never have to
+be loaded again.
+
+Files on disk larger than ``PARALLEL_INGEST_THRESHOLD`` bytes are split on
+line boundaries and the partitions are parsed in a process pool; the partial
+summaries are merged into the same structure.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from django.conf import settings
+
+from . import columns, storage
+from .stats import compute_stats, merge_stats
+
+
+class IngestError(ValueError):
+    pass
+
+
+class RunningSummary:
+    """Incrementally maintained version of the upload summary."""
+
+    def __init__(self):
+        self.total_count = 0
+        self.sums = {col: 0.0 for col in columns.NUMERIC_COLUMNS}
+        self.counts = {col: 0 for col in columns.NUMERIC_COLUMNS}
+        self.type_counts = {}
+        self.stats = None  # api.stats sufficient statistics of every row so far
+
+    def update(self, chunk):
+        self.total_count += len(chunk)
+        for col in columns.NUMERIC_COLUMNS:
+            values = chunk[col]
+            self.sums[col] += float(values.sum())
+            self.counts[col] += int(values.count())
+        for eq_type, count in chunk['Type'].value_counts().items():
+            self.type_counts[eq_type] = self.type_counts.get(eq_type, 0) + int(count)
+        self.merge_stats(compute_stats(chunk))
+
+    def merge_stats(self, stats):
+        self.stats = stats if self.stats is None else merge_stats(self.stats, stats)
+
+    def merge(self, other):
+        self.total_count += other.total_count
+        for col in columns.NUMERIC_COLUMNS:
+            self.sums[col] += other.sums[col]
+            self.counts[col] += other.counts[col]
+        for eq_type, count in other.type_counts.items():
+            self.type_counts[eq_type] = self.type_counts.get(eq_type, 0) + count
+        if other.stats is not None:
+            self.merge_stats(other.stats)
+
+    def mean(self, col):
+        return self.sums[col] / self.counts[col] if self.counts[col] else None
+
+    def as_dict(self):
+        return {
+            'total_count': self.total_count,
+            'avg_flowrate': self.mean('Flowrate'),
+            'avg_pressure': self.mean('Pressure'),
+            'avg_temperature': self.mean('Temperature'),
+            'type_distribution': dict(
+                sorted(self.type_counts.items(), key=lambda item: item[1], reverse=True)
+            )
+        }
+
+
+def validate_columns(df):
+    if not all(col in df.columns for col in columns.REQUIRED_COLUMNS):
+        raise IngestError('Missing required columns')
+
+
+def _local_path(file):
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    # Large Django uploads are spooled to a temporary file
+    if hasattr(file, 'temporary_file_path'):
+        return file.temporary_file_path()
+    return None
+
+
+def iter_chunks(file, chunksize=None):
+    """Yield validated ``chunksize``-row frames read from ``file``."""
+    chunksize = chunksize or settings.UPLOAD_CHUNK_SIZE
+    for i, chunk in enumerate(pd.read_csv(file, chunksize=chunksize)):
+        if i == 0:
+            validate_columns(chunk)
+        yield chunk
+
+
+def ingest_csv(file, chunksize=None, parallel=None):
+    """Stream ``file`` into storage and return ``(storage_key, running_summary)``.
+
+    ``parallel`` forces the partitioned path on (True) or off (False); by
+    default it is used for files on disk above ``PARALLEL_INGEST_THRESHOLD``.
+    """
+    chunksize = chunksize or settings.UPLOAD_CHUNK_SIZE
+    path = _local_path(file)
+    if parallel is None:
+        parallel = path is not None and os.path.getsize(path) >= settings.PARALLEL_INGEST_THRESHOLD
+    if parallel and path is not None:
+        return ingest_csv_parallel(path, chunksize)
+
+    writer = storage.StorageWriter()
+    running = RunningSummary()
+    try:
+        for chunk in iter_chunks(file, chunksize):
+            running.update(chunk)
+            writer.write_part(chunk)
+        # A header-only CSV still yields one empty chunk (and part)
+        if not running.total_count:
+            raise IngestError('No rows in file')
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    return writer.key, running
+
+
+def split_ranges(path, partitions):
+    """Split the rows of ``path`` into byte ranges that end on line boundaries.
+
+    Returns ``(header_end, ranges)``. Quoted fields containing newlines are
+    not supported on this path.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        header_end = f.tell()
+        bounds = [header_end]
+        step = max(1, (size - header_end) // partitions)
+        for i in range(1, partitions):
+            f.seek(max(header_end + i * step, bounds[-1]))
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            if position > bounds[-1]:
+                bounds.append(position)
+    bounds.append(size)
+    return header_end, [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+class _RangeReader:
+    """Read-only file object limited to the bytes in ``[start, end)``."""
+
+    def __init__(self, path, start, end):
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        # pandas only treats objects with __iter__ as file-like
+        return iter(self.file.readline, b'')
+
+    def close(self):
+        self.file.close()
+
+
+def _ingest_range(path, key, index, start, end, names, chunksize):
+    """Parse one partition into storage parts; runs in a worker process."""
+    running = RunningSummary()
+    parts = []
+    reader = _RangeReader(path, start, end)
+    try:
+        for n, chunk in enumerate(pd.read_csv(reader, header=None, names=names, chunksize=chunksize)):
+            running.update(chunk)
+            parts.append(storage.write_part(key, chunk, f'part-{index:05d}-{n:05d}'))
+    finally:
+        reader.close()
+    return parts, running
+
+
+def ingest_csv_parallel(path, chunksize=None, workers=None):
+    chunksize = chunksize or settings.UPLOAD_CHUNK_SIZE
+    workers = workers or settings.PARALLEL_INGEST_WORKERS
+    names = list(pd.read_csv(path, nrows=0).columns)
+    validate_columns(pd.DataFrame(columns=names))
+
+    _, ranges = split_ranges(path, workers)
+    writer = storage.StorageWriter()
+    running = RunningSummary()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_ingest_range, path, writer.key, i, start, end, names, chunksize)
+                for i, (start, end) in enumerate(ranges)
+            ]
+            # Merge in file order so parts keep the original row order
+            for future in futures:
+                parts, partial = future.result()
+                for part in parts:
+                    writer.add_part(part, names)
+                running.merge(partial)
+        # A header-only CSV still yields one empty chunk (and part)
+        if not running.total_count:
+            raise IngestError('No rows in file')
+        writer.commit()
+    except Exception:
+        writer.abort()
+        raise
+    return writer.key, running
@@ -0,0 +1,199 @@
+"""Database-backed background jobs for uploads and PDF reports.
+
+Views enqueue a ``Job`` row and return 202; ``python manage.py run_jobs``
+starts worker processes that claim queued jobs with a conditional UPDATE, so
+the database is the only broker needed. Clients poll (or long-poll)
+``/api/jobs/<id>/`` and fetch the output from ``/api/jobs/<id>/result/``.
+Finished jobs are deleted after ``JOB_RETENTION`` seconds, together with
+their result files.
+
+While a job runs, a thread in the worker refreshes its ``heartbeat_at``, so
+long uploads stay alive and only jobs whose worker died are reaped.
+"""
+import json
+import os
+import shutil
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import reports
+from .datasets import create_dataset
+from .models import Dataset, Job
+
+
+def _media_dir(name):
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def stage_upload(file):
+    """Copy an uploaded file to disk so a worker process can read it."""
+    path = os.path.join(_media_dir('uploads'), f'{uuid.uuid4().hex}.csv')
+    with open(path, 'wb') as f:
+        for chunk in file.chunks():
+            f.write(chunk)
+    return path
+
+
+def enqueue(user, kind, payload):
+    return Job.objects.create(user=user, kind=kind, payload=json.dumps(payload))
+
+
+def claim_next():
+    """Atomically move the oldest queued job to running and return it."""
+    for job_id in Job.objects.filter(status=Job.STATUS_QUEUED).values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def reap_stale():
+    """Fail running jobs without a heartbeat for JOB_STALE_TIMEOUT seconds.
+
+    A worker that dies mid-job never records a result, so without this the
+    job would stay ``running`` and clients would poll it forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_TIMEOUT)
+    # Jobs claimed before heartbeats existed only have started_at
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    reaped = 0
+    for job in Job.objects.filter(stale, status=Job.STATUS_RUNNING):
+        failed = Job.objects.filter(stale, id=job.id, status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_FAILED, finished_at=timezone.now(),
+            error=f'The worker sent no heartbeat for {settings.JOB_STALE_TIMEOUT} seconds'
+        )
+        if not failed:
+            continue
+        reaped += 1
+        if job.kind == Job.KIND_UPLOAD:
+            try:
+                os.remove(job.get_payload()['path'])
+            except OSError:
+                pass
+    return reaped
+
+
+def purge_finished():
+    """Delete jobs that finished more than JOB_RETENTION seconds ago."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_RETENTION)
+    deleted, _ = Job.objects.filter(status__in=Job.FINISHED, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+@receiver(post_delete, sender=Job)
+def _job_deleted(sender, instance, **kwargs):
+    # Report and batch ZIP files belong to their job (users cascade here too)
+    if instance.result_file:
+        try:
+            os.remove(instance.result_file)
+        except OSError:
+            pass
+
+
+def run_upload(job):
+    payload = job.get_payload()
+    try:
+        dataset = create_dataset(job.user, payload['name'], payload['path'], payload.get('sha256'))
+    finally:
+        os.remove(payload['path'])
+    return {'id': dataset.id, 'summary': dataset.get_summary()}, ''
+
+
+def run_report(job):
+    dataset = Dataset.objects.get(id=job.get_payload()['dataset_id'], user=job.user)
+    cached = reports.get_report_path(dataset)
+    # The cached report is deleted when the dataset changes or is pruned, so
+    # the job keeps its own link (or copy) of the file
+    path = os.path.join(_media_dir('reports'), f'report-job-{job.id}.pdf')
+    try:
+        os.link(cached, path)
+    except OSError:
+        shutil.copyfile(cached, path)
+    return {'dataset_id': dataset.id, 'filename': reports.report_filename(dataset)}, path
+
+
+def run_report_batch(job):
+    dataset_ids = job.get_payload()['dataset_ids']
+    datasets = list(Dataset.objects.filter(id__in=dataset_ids, user=job.user))
+    path = os.path.join(_media_dir('reports'), f'batch-job-{job.id}.zip')
+    reports.write_report_zip(datasets, path)
+    return {'dataset_ids': [d.id for d in datasets], 'filename': 'reports.zip'}, path
+
+
+HANDLERS = {
+    Job.KIND_UPLOAD: run_upload,
+    Job.KIND_REPORT: run_report,
+    Job.KIND_REPORT_BATCH: run_report_batch,
+}
+
+
+def _heartbeat(job_id, stop):
+    """Touch ``heartbeat_at`` every JOB_HEARTBEAT_INTERVAL until ``stop`` is set."""
+    try:
+        while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                beating = Job.objects.filter(id=job_id, status=Job.STATUS_RUNNING).update(
+                    heartbeat_at=timezone.now()
+                )
+            except DatabaseError:
+                # SQLite is locked while the job itself writes; try the next beat
+                continue
+            if not beating:
+                return
+    finally:
+        # The thread's own connection
+        connection.close()
+
+
+def run_job(job):
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job.id, stop), daemon=True)
+    heartbeat.start()
+    try:
+        result, result_file = HANDLERS[job.kind](job)
+        fields = {'status': Job.STATUS_SUCCEEDED, 'result': json.dumps(result), 'result_file': result_file}
+    except Exception as e:
+        result_file = ''
+        fields = {'status': Job.STATUS_FAILED, 'error': str(e) or traceback.format_exc()}
+    finally:
+        stop.set()
+        heartbeat.join()
+    # Only a job still running is finished: one the reaper already failed
+    # stays failed rather than coming back as succeeded
+    finished = Job.objects.filter(id=job.id, status=Job.STATUS_RUNNING).update(
+        finished_at=timezone.now(), **fields
+    )
+    if not finished and result_file:
+        try:
+            os.remove(result_file)
+        except OSError:
+            pass
+    job.refresh_from_db()
+    return job
+
+
+def job_to_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'result': job.get_result(),
+        'error': job.error or None,
+    }
@@ -0,0 +1,255 @@
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.synthetic import write_synthetic_csv
+
+ENDPOINTS = ['upload_csv', 'upload_csv_dedup', 'get_history', 'get_dataset', 'get_dataset_rows',
+             'get_dataset_trends', 'get_dashboard', 'generate_report']
+
+
+def peak_rss_reset():
+    """Reset the peak RSS high-water mark where Linux allows it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Lifetime peak; kilobytes on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 / (1024 if platform.system() == 'Darwin' else 1)
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints on synthetic datasets and save the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='10000,100000',
+                            help='Comma-separated dataset sizes, e.g. 10000,1000000,10000000')
+        parser.add_argument('--repeat', type=int, default=20, help='Requests per read endpoint')
+        parser.add_argument('--upload-repeat', type=int, default=3, help='Requests per upload endpoint')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+        parser.add_argument('--cold', action='store_true',
+                            help='Clear the response and report caches before every request')
+        parser.add_argument('--output', help='JSON results path (default: .cache/bench/api-<time>.json)')
+        parser.add_argument('--baseline', help='Earlier results file to compare p50 latencies against')
+
+    def handle(self, *args, **options):
+        sizes = [int(n) for n in options['rows'].split(',')]
+        endpoints = options['endpoints'].split(',')
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            self.stderr.write(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+            return
+
+        tmp = tempfile.mkdtemp(prefix='bench-api-')
+        media_root = os.path.join(tmp, 'media')
+        overrides = override_settings(
+            ASYNC_JOBS=False,
+            MEDIA_ROOT=media_root,
+            DATASET_STORAGE_ROOT=os.path.join(media_root, 'datasets'),
+            ALLOWED_HOSTS=['testserver'],
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'responses': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': os.path.join(tmp, 'responses'),
+                },
+                'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            },
+        )
+        # Run against a throwaway test database so real data is never touched
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        overrides.enable()
+        try:
+            results = []
+            for rows in sizes:
+                csv_path = write_synthetic_csv(os.path.join(tmp, f'bench-{rows}.csv'), rows)
+                results += self.bench_size(csv_path, rows, endpoints, options)
+        finally:
+            overrides.disable()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'database': connection.vendor,
+            'options': {k: options[k] for k in ('rows', 'repeat', 'upload_repeat', 'cold')},
+            'results': results,
+        }
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, '.cache', 'bench', f"api-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+        baseline = self.load_baseline(options['baseline'])
+        self.print_results(results, baseline)
+        self.stdout.write(f'Results written to {output}')
+
+    def bench_size(self, csv_path, rows, endpoints, options):
+        user = User.objects.create_user(username=f'bench-api-{rows}', password='bench')
+        token = Token.objects.create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        csv_bytes = os.path.getsize(csv_path)
+
+        def upload():
+            with open(csv_path, 'rb') as f:
+                return client.post('/api/upload/', {'file': f})
+
+        def fresh_upload():
+            # A trailing blank line changes the hash (so the file is parsed)
+            # without changing the rows
+            with open(csv_path, 'a') as f:
+                f.write('\n')
+            return upload()
+
+        response = fresh_upload()
+        if response.status_code != 200:
+            raise CommandError(f'{rows} rows: setup upload failed: {response.content[:200]!r}')
+        dataset_id = response.json()['id']
+
+        requests = {
+            'upload_csv': (fresh_upload, options['upload_repeat']),
+            'upload_csv_dedup': (upload, options['upload_repeat']),
+            'get_history': (lambda: client.get('/api/history/'), options['repeat']),
+            'get_dataset': (lambda: client.get(f'/api/dataset/{dataset_id}/'), options['repeat']),
+            'get_dataset_rows': (lambda: client.get(f'/api/dataset/{dataset_id}/rows/'), options['repeat']),
+            'get_dataset_trends': (lambda: client.get(f'/api/dataset/{dataset_id}/trends/'), options['repeat']),
+            'get_dashboard': (lambda: client.get('/api/dashboard/'), options['repeat']),
+            'generate_report': (
+                lambda: client.post('/api/report/', {'dataset_id': dataset_id}, content_type='application/json'),
+                max(1, options['repeat'] // 4),
+            ),
+        }
+        # Uploads go last: each one can prune the setup dataset from the
+        # user's history, which would turn every later read into a 404
+        ordered = sorted(endpoints, key=lambda endpoint: endpoint.startswith('upload_csv'))
+        results = []
+        for endpoint in ordered:
+            request, count = requests[endpoint]
+            results.append(self.measure(endpoint, request, count, rows, csv_bytes, options['cold']))
+            self.stdout.write(f'{rows} rows: {endpoint} done')
+        user.delete()
+        return results
+
+    def clear_caches(self):
+        caches['responses'].clear()
+        caches['default'].clear()
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'reports'), ignore_errors=True)
+
+    def measure(self, endpoint, request, count, rows, csv_bytes, cold):
+        rss_reset = peak_rss_reset()
+        latencies = []
+        for _ in range(count):
+            if cold:
+                self.clear_caches()
+            start = time.perf_counter()
+            response = request()
+            if response.streaming:
+                # Include reading the file being served
+                for _chunk in response.streaming_content:
+                    pass
+                response.close()
+            elapsed = time.perf_counter() - start
+            if not 200 <= response.status_code < 300:
+                # An error response would time the error path, not the endpoint
+                body = b'' if response.streaming else response.content[:200]
+                raise CommandError(f'{rows} rows: {endpoint} returned {response.status_code}: {body!r}')
+            latencies.append(elapsed)
+
+        ordered = sorted(latencies)
+        total = sum(latencies)
+        result = {
+            'endpoint': endpoint,
+            'rows': rows,
+            'csv_bytes': csv_bytes,
+            'requests': count,
+            'first_ms': latencies[0] * 1000,
+            'latency_ms': {
+                'min': ordered[0] * 1000,
+                'mean': statistics.fmean(latencies) * 1000,
+                'p50': percentile(ordered, 50) * 1000,
+                'p90': percentile(ordered, 90) * 1000,
+                'p95': percentile(ordered, 95) * 1000,
+                'p99': percentile(ordered, 99) * 1000,
+                'max': ordered[-1] * 1000,
+            },
+            'throughput_rps': count / total if total else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_scope': 'endpoint' if rss_reset else 'process',
+        }
+        if endpoint.startswith('upload_csv'):
+            result['rows_per_s'] = rows * count / total if total else None
+            result['mb_per_s'] = csv_bytes * count / total / 1024 / 1024 if total else None
+        return result
+
+    def load_baseline(self, path):
+        if not path:
+            return {}
+        with open(path) as f:
+            previous = json.load(f)
+        return {(r['endpoint'], r['rows']): r for r in previous['results']}
+
+    def print_results(self, results, baseline):
+        self.stdout.write(
+            f"{'endpoint':20s} {'rows':>10s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s} "
+            f"{'req/s':>9s} {'rss MB':>8s}"
+        )
+        for r in results:
+            latency = r['latency_ms']
+            line = (
+                f"{r['endpoint']:20s} {r['rows']:10d} {latency['p50']:10.2f} {latency['p95']:10.2f} "
+                f"{latency['p99']:10.2f} {r['throughput_rps'] or 0:9.1f} {r['peak_rss_mb']:8.1f}"
+            )
+            previous = baseline.get((r['endpoint'], r['rows']))
+            if previous:
+                line += f"  x{latency['p50'] / previous['latency_ms']['p50']:.2f} vs baseline"
+            self.stdout.write(line)
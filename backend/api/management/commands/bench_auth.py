@@ -0,0 +1,60 @@
+import base64
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from api.authentication import CachedTokenAuthentication, invalidate_token
+
+
+class Command(BaseCommand):
+    help = 'Compare the per-request cost of Basic and token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        n = options['requests']
+        # Run against a throwaway test database so real users are never touched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            results = self.bench(n)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for name, seconds in results.items():
+            self.stdout.write(f'{name:20s} {seconds * 1e6 / n:12.1f} us/request')
+
+    def bench(self, n):
+        username, password = 'bench-auth-user', 'bench-auth-password'
+        user = User.objects.create_user(username=username, password=password)
+        token = Token.objects.create(user=user)
+        factory = APIRequestFactory()
+        basic = 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+        try:
+            return {
+                'basic': self.measure(BasicAuthentication(), factory, basic, n),
+                'token (cold cache)': self.measure(CachedTokenAuthentication(), factory,
+                                                   f'Token {token.key}', n, token_key=token.key),
+                'token (cached)': self.measure(CachedTokenAuthentication(), factory,
+                                               f'Token {token.key}', n),
+            }
+        finally:
+            # The auth cache is not part of the test database
+            invalidate_token(token.key)
+
+    def measure(self, authenticator, factory, header, n, token_key=None):
+        request = factory.get('/api/history/', HTTP_AUTHORIZATION=header)
+        authenticator.authenticate(request)  # warm up
+        total = 0.0
+        for _ in range(n):
+            if token_key:
+                invalidate_token(token_key)
+            start = time.perf_counter()
+            authenticator.authenticate(request)
+            total += time.perf_counter() - start
+        return total
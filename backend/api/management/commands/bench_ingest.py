@@ -0,0 +1,83 @@
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from api.datasets import create_dataset, release_blobs
+from api.columns import NUMERIC_COLUMNS
+from api.synthetic import write_synthetic_csv
+
+
+class Command(BaseCommand):
+    help = 'Compare single-core and parallel uploads end to end (create_dataset)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2_000_000)
+        parser.add_argument('--workers', type=int, default=settings.PARALLEL_INGEST_WORKERS)
+        parser.add_argument('--chunksize', type=int, default=settings.UPLOAD_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        tmp = tempfile.mkdtemp(prefix='bench-ingest-')
+        overrides = override_settings(
+            MEDIA_ROOT=tmp,
+            DATASET_STORAGE_ROOT=os.path.join(tmp, 'datasets'),
+            PARALLEL_INGEST_WORKERS=options['workers'],
+            UPLOAD_CHUNK_SIZE=options['chunksize'],
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            },
+        )
+        # Run against a throwaway test database so real data is never touched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        overrides.enable()
+        try:
+            path = write_synthetic_csv(os.path.join(tmp, 'bench.csv'), options['rows'])
+            self.bench(path, options)
+        finally:
+            overrides.disable()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def bench(self, path, options):
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        self.stdout.write(f"{options['rows']} rows, {size_mb:.1f} MB, {options['workers']} workers")
+        user = User.objects.create_user(username='bench-ingest', password='!')
+
+        # The threshold decides which path create_dataset takes for a file on disk
+        runs = {'single-core': math.inf, 'parallel': 0}
+        baseline = None
+        results = {}
+        for name, threshold in runs.items():
+            with override_settings(PARALLEL_INGEST_THRESHOLD=threshold):
+                start = time.perf_counter()
+                dataset = create_dataset(user, 'bench.csv', path)
+                elapsed = time.perf_counter() - start
+            results[name] = dataset.get_summary()
+            rows = results[name]['total_count']
+            dataset.delete()
+            release_blobs([dataset.blob_id])
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f'{name:12s} {elapsed:8.2f} s {size_mb / elapsed:8.1f} MB/s '
+                f"{rows / elapsed:12.0f} rows/s  x{baseline / elapsed:.2f}"
+            )
+
+        single, parallel = results['single-core'], results['parallel']
+        mismatched = [
+            key for key in ['total_count'] + [f'avg_{col.lower()}' for col in NUMERIC_COLUMNS]
+            if not math.isclose(single[key], parallel[key], rel_tol=1e-9)
+        ]
+        if mismatched or single['type_distribution'] != parallel['type_distribution']:
+            self.stderr.write(f"Summaries differ: {', '.join(mismatched) or 'type_distribution'}")
+        else:
+            self.stdout.write('Summaries of both runs match')
+        user.delete()
@@ -0,0 +1,127 @@
+import json
+import random
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api import reports
+from api.analytics import compute_analytics
+from api.datasets import prune_history, release_blobs
+from api.ingest import RunningSummary
+from api.response_cache import invalidate_user
+from api.models import Dataset, DatasetBlob, ResponseVersion
+from api.stats import compute_stats
+from api.synthetic import synthetic_frame
+
+
+class Command(BaseCommand):
+    help = 'Count and time the queries of the per-user dataset list and prune paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--sample', type=int, default=200, help='Users measured per path')
+
+    def handle(self, *args, **options):
+        tmp = tempfile.mkdtemp(prefix='bench-queries-')
+        overrides = override_settings(
+            MEDIA_ROOT=tmp,
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            },
+        )
+        # Run against a throwaway test database so real data is never touched
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        overrides.enable()
+        try:
+            users = self.populate(options['users'])
+            sample = random.Random(0).sample(users, min(options['sample'], len(users)))
+            self.explain(sample[0])
+            self.report('history (full rows)', sample, lambda u: list(
+                Dataset.objects.filter(user=u)[:settings.HISTORY_LIMIT]
+            ))
+            self.report('history (projected)', sample, lambda u: list(
+                Dataset.objects.filter(user=u).only('id', 'name', 'uploaded_at', 'summary')[:settings.HISTORY_LIMIT]
+            ))
+            half = len(sample) // 2
+            self.report('prune (len + slice)', sample[:half], self.legacy_prune, setup=self.add_dataset)
+            self.report('prune (delete returning)', sample[half:], prune_history, setup=self.add_dataset)
+        finally:
+            overrides.disable()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def populate(self, count):
+        frame = synthetic_frame(10000)
+        running = RunningSummary()
+        running.update(frame)
+        self.fields = {
+            'summary': json.dumps(running.as_dict()),
+            'analytics': json.dumps(compute_analytics(frame)),
+            'stats': json.dumps(compute_stats(frame)),
+        }
+        self.blob = DatasetBlob.objects.create(storage_key='bench-queries', refcount=10 ** 9)
+
+        start = time.perf_counter()
+        User.objects.bulk_create(
+            [User(username=f'bench-queries-{i}', password='!') for i in range(count)], batch_size=1000
+        )
+        users = list(User.objects.filter(username__startswith='bench-queries-'))
+        datasets = [
+            Dataset(user=user, name=f'dataset-{i}.csv', blob=self.blob, analytics_version=1, **self.fields)
+            for user in users for i in range(settings.HISTORY_LIMIT)
+        ]
+        Dataset.objects.bulk_create(datasets, batch_size=1000)
+        # Steady state: every user has invalidated its responses before
+        ResponseVersion.objects.bulk_create([ResponseVersion(user=user) for user in users], batch_size=1000)
+        self.stdout.write(
+            f'{len(users)} users, {len(datasets)} datasets created in {time.perf_counter() - start:.1f} s'
+        )
+        return users
+
+    def add_dataset(self, user):
+        Dataset.objects.create(user=user, name='extra.csv', blob=self.blob, analytics_version=1, **self.fields)
+
+    def legacy_prune(self, user):
+        # The pruning code as it was before the (user, uploaded_at) index
+        invalidate_user(user.id)
+        user_datasets = Dataset.objects.filter(user=user)
+        if len(user_datasets) > settings.HISTORY_LIMIT:
+            old_datasets = list(user_datasets[settings.HISTORY_LIMIT:])
+            Dataset.objects.filter(pk__in=[d.pk for d in old_datasets]).delete()
+            release_blobs([d.blob_id for d in old_datasets])
+            reports.delete_reports([d.pk for d in old_datasets])
+
+    def explain(self, user):
+        queryset = Dataset.objects.filter(user=user).only('id', 'name', 'uploaded_at', 'summary')[:settings.HISTORY_LIMIT]
+        sql, params = queryset.query.sql_with_params()
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            plan = [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+        self.stdout.write('history query plan:')
+        for line in plan:
+            self.stdout.write(f'  {line}')
+
+    def report(self, name, users, run, setup=None):
+        queries = 0
+        elapsed = 0.0
+        for user in users:
+            if setup:
+                setup(user)
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                run(user)
+                elapsed += time.perf_counter() - start
+            queries += len(captured)
+        self.stdout.write(
+            f'{name:24s} {queries / len(users):6.1f} queries/call {elapsed * 1000 / len(users):8.3f} ms/call'
+        )
@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.analytics import compute_analytics
+from api.synthetic import synthetic_frame
+
+
+class Command(BaseCommand):
+    help = "Compare JSON encoders on a get_dataset-style response with every row included"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def best_of(self, repeat, func):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    def handle(self, *args, **options):
+        frame = synthetic_frame(options['rows'])
+        header = {
+            'id': 1,
+            'summary': {'total_count': len(frame), 'columns': list(frame.columns)},
+            'analytics': compute_analytics(frame),
+        }
+        # The payload is built inside each run: converting rows to Python objects is part of the cost
+        runs = {
+            'drf records': lambda: JSONRenderer().render({**header, 'results': frame.to_dict('records')}),
+            'fast records': lambda: renderers.encode({**header, 'results': frame.to_dict('records')}),
+            'fast columns': lambda: renderers.encode(
+                {**header, 'columns': {name: frame[name].to_numpy() for name in frame.columns}}
+            ),
+        }
+        backend = 'orjson' if renderers.orjson is not None else 'json fallback'
+        self.stdout.write(f"{options['rows']} rows, FastJSONRenderer uses {backend}")
+
+        baseline = None
+        bodies = {}
+        for name, run in runs.items():
+            elapsed, body = self.best_of(options['repeat'], run)
+            bodies[name] = body
+            baseline = baseline or elapsed
+            size_mb = len(body) / 1024 / 1024
+            self.stdout.write(
+                f'{name:14s} {elapsed * 1000:9.1f} ms {size_mb:8.1f} MB '
+                f'{size_mb / elapsed:8.1f} MB/s  x{baseline / elapsed:.2f}'
+            )
+
+        cached = renderers.PreEncodedJSON(bodies['fast columns'])
+        elapsed, _ = self.best_of(options['repeat'], lambda: renderers.FastJSONRenderer().render(cached))
+        self.stdout.write(f"{'pre-encoded':14s} {elapsed * 1000:9.3f} ms")
+
+        body = bodies['fast records']
+        elapsed, _ = self.best_of(options['repeat'], lambda: json.loads(body))
+        self.stdout.write(f"{'json.loads':14s} {elapsed * 1000:9.1f} ms")
+        if renderers.orjson is not None:
+            elapsed, _ = self.best_of(options['repeat'], lambda: renderers.orjson.loads(body))
+            self.stdout.write(f"{'orjson.loads':14s} {elapsed * 1000:9.1f} ms")
@@ -0,0 +1,53 @@
+import multiprocessing
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def work(poll_interval, once):
+    # Spawned (Windows) children start without a configured Django
+    django.setup()
+    from api import jobs
+
+    # Each process opens its own database connection
+    connections.close_all()
+    while True:
+        jobs.reap_stale()
+        jobs.purge_finished()
+        job = jobs.claim_next()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        jobs.run_job(job)
+
+
+class Command(BaseCommand):
+    help = 'Run background upload and report jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        args = (options['poll_interval'], options['once'])
+        self.stdout.write(f'Starting {processes} job worker(s)')
+        if processes == 1:
+            work(*args)
+            return
+        connections.close_all()
+        workers = [multiprocessing.Process(target=work, args=args) for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
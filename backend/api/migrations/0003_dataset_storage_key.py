@@ -0,0 +1,49 @@
+import json
+
+import pandas as pd
+from django.db import migrations, models
+
+
+def convert_json_rows(apps, schema_editor):
+    from api import storage
+
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.all().iterator():
+        df = pd.DataFrame(json.loads(dataset.data or '[]'))
+        dataset.storage_key = storage.write_frame(df)
+        dataset.save(update_fields=['storage_key'])
+
+
+def restore_json_rows(apps, schema_editor):
+    from api import storage
+
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.all().iterator():
+        if dataset.storage_key:
+            dataset.data = storage.read_frame(dataset.storage_key).to_json(orient='records')
+            dataset.save(update_fields=['data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_dataset_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='storage_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='dataset',
+            name='data',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(convert_json_rows, restore_json_rows),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='data',
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_dataset_storage_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='analytics',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='analytics_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_dataset_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='stats',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
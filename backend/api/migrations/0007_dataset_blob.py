@@ -0,0 +1,53 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_blobs(apps, schema_editor):
+    # Existing rows each get their own blob; their original bytes were never hashed
+    Dataset = apps.get_model('api', 'Dataset')
+    DatasetBlob = apps.get_model('api', 'DatasetBlob')
+    for dataset in Dataset.objects.all().iterator():
+        dataset.blob = DatasetBlob.objects.create(storage_key=dataset.storage_key, refcount=1)
+        dataset.save(update_fields=['blob'])
+
+
+def restore_storage_keys(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.select_related('blob').iterator():
+        dataset.storage_key = dataset.blob.storage_key
+        dataset.save(update_fields=['storage_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True, unique=True)),
+                ('storage_key', models.CharField(max_length=64)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='api.datasetblob'),
+        ),
+        migrations.RunPython(create_blobs, restore_storage_keys),
+        migrations.AlterField(
+            model_name='dataset',
+            name='blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='api.datasetblob'),
+        ),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='storage_key',
+        ),
+    ]
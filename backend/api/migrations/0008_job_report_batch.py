@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_dataset_blob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('upload', 'Upload'), ('report', 'Report'), ('report_batch', 'Report batch')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-17 15:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_dataset_user_uploaded_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetblob',
+            name='readings_loaded',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='EquipmentReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(blank=True, max_length=100)),
+                ('flowrate', models.FloatField(null=True)),
+                ('pressure', models.FloatField(null=True)),
+                ('temperature', models.FloatField(null=True)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='readings', to='api.datasetblob')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['blob', 'type'], name='api_reading_blob_type')],
+            },
+        ),
+    ]
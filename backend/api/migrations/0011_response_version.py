@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 16:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('api', '0010_equipment_reading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_job_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='EquipmentReading',
+        ),
+        migrations.RemoveField(
+            model_name='datasetblob',
+            name='readings_loaded',
+        ),
+    ]
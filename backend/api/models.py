@@ -2,18 +2,125 @@ from django.db import models
 from django.contrib.auth.models import User
 import json
 
+from . import storage
+from .profiling import span
+from .analytics import ANALYTICS_COLUMNS, ANALYTICS_VERSION, compute_analytics
+from .stats import STATS_COLUMNS, STATS_VERSION, compute_stats
+
+class DatasetBlob(models.Model):
+    # Parsed storage shared by every Dataset uploaded from identical bytes
+    sha256 = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    storage_key = models.CharField(max_length=64)  # Columnar storage directory (see api.storage)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
 class Dataset(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     uploaded_at = models.DateTimeField(auto_now_add=True)
-    data = models.TextField()  # JSON string of the data
+    blob = models.ForeignKey(DatasetBlob, on_delete=models.PROTECT)
     summary = models.TextField()  # JSON string of summary stats
+    analytics = models.TextField(blank=True, default='')  # JSON string of precomputed analytics
+    analytics_version = models.PositiveIntegerField(default=0)
+    stats = models.TextField(blank=True, default='')  # JSON string of mergeable sufficient statistics
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Every list path filters by user and orders by upload time
+            models.Index(fields=['user', '-uploaded_at'], name='api_dataset_user_uploaded'),
+        ]
+    
+    @property
+    def storage_key(self):
+        return self.blob.storage_key
+    
+    def load_frame(self, columns=None):
+        with span('storage'):
+            return storage.read_frame(self.storage_key, columns)
+    
+    def load_rows(self, indices, columns=None):
+        with span('storage'):
+            return storage.read_rows(self.storage_key, indices, columns)
+    
+    def get_columns(self):
+        return storage.read_manifest(self.storage_key)['columns']
     
     def get_data(self):
-        return json.loads(self.data)
+        return self.load_frame().to_dict('records')
     
     def get_summary(self):
-        return json.loads(self.summary)
\ No newline at end of file
+        with span('json'):
+            return json.loads(self.summary)
+
+    
+    def get_analytics(self):
+        # Backfill rows stored before the current analytics version
+        if self.analytics_version != ANALYTICS_VERSION or not self.analytics:
+            self.set_analytics(compute_analytics(self.load_frame(ANALYTICS_COLUMNS)))
+            self.save(update_fields=['analytics', 'analytics_version'])
+        with span('json'):
+            return json.loads(self.analytics)
+    
+    def set_analytics(self, analytics):
+        self.analytics = json.dumps(analytics)
+        self.analytics_version = ANALYTICS_VERSION
+    
+    def get_stats(self):
+        with span('json'):
+            stats = json.loads(self.stats) if self.stats else None
+        if not stats or stats.get('version') != STATS_VERSION:
+            stats = compute_stats(self.load_frame(STATS_COLUMNS))
+            self.stats = json.dumps(stats)
+            self.save(update_fields=['stats'])
+        return stats
+
+class Job(models.Model):
+    KIND_UPLOAD = 'upload'
+    KIND_REPORT = 'report'
+    KIND_REPORT_BATCH = 'report_batch'
+    KIND_CHOICES = [(KIND_UPLOAD, 'Upload'), (KIND_REPORT, 'Report'), (KIND_REPORT_BATCH, 'Report batch')]
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    FINISHED = (STATUS_SUCCEEDED, STATUS_FAILED)
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, db_index=True)
+    payload = models.TextField(default='{}')  # JSON string of job arguments
+    result = models.TextField(blank=True, default='')  # JSON string of the job result
+    result_file = models.CharField(max_length=500, blank=True)  # Path of a file produced by the job
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last sign of life from the worker
+    
+    class Meta:
+        ordering = ['created_at']
+    
+    def get_payload(self):
+        return json.loads(self.payload)
+    
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
+    
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+class ResponseVersion(models.Model):
+    # Per-user version of the cached API responses (see api.response_cache).
+    # It lives in the database because a cache may evict it, and a version
+    # that restarts would make old ETags and bodies match again
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveIntegerField(default=1)
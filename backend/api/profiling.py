@@ -0,0 +1,229 @@
+"""Opt-in request profiling.
+
+``ProfilingMiddleware`` (enabled with ``PROFILING_ENABLED``) times every API
+request, counts and times its database queries, measures the payload size
+and, optionally, the peak traced memory (see ``MemoryTracer``). Code marks its phases with
+``span('parse')`` and friends; outside a profiled request ``span`` is a
+no-op. Results are sent back in a ``Server-Timing`` header, aggregated
+per view for ``/api/metrics/`` (Prometheus text format, per process), and
+requests slower than ``PROFILING_CPROFILE_THRESHOLD_MS`` can be dumped as
+cProfile files.
+"""
+import contextlib
+import contextvars
+import cProfile
+import os
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.spans = {}
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.memory_start = None  # traced bytes when the request started, if measured alone
+
+    def add(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def span(name):
+    """Time a phase of the current request; does nothing when not profiling."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+
+class MetricsRegistry:
+    """Per-process aggregates exported in Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+
+    def observe(self, view, status, duration, profile, payload_bytes, peak_memory):
+        with self.lock:
+            entry = self.requests.setdefault(view, {
+                'count': 0, 'duration': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS),
+                'statuses': {}, 'phases': {}, 'db_queries': 0, 'db_time': 0.0,
+                'payload_bytes': 0, 'peak_memory': 0,
+            })
+            entry['count'] += 1
+            entry['duration'] += duration
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    entry['buckets'][i] += 1
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            for name, seconds in profile.spans.items():
+                phase = entry['phases'].setdefault(name, [0, 0.0])
+                phase[0] += 1
+                phase[1] += seconds
+            entry['db_queries'] += profile.db_queries
+            entry['db_time'] += profile.db_time
+            entry['payload_bytes'] += payload_bytes
+            entry['peak_memory'] = max(entry['peak_memory'], peak_memory or 0)
+
+    def render(self):
+        lines = [
+            '# TYPE api_request_duration_seconds histogram',
+            '# TYPE api_requests_total counter',
+            '# TYPE api_phase_duration_seconds summary',
+            '# TYPE api_db_queries_total counter',
+            '# TYPE api_db_duration_seconds_total counter',
+            '# TYPE api_response_bytes_total counter',
+            '# TYPE api_peak_memory_bytes gauge',
+        ]
+        with self.lock:
+            for view, entry in sorted(self.requests.items()):
+                label = f'view="{view}"'
+                for bound, count in zip(LATENCY_BUCKETS, entry['buckets']):
+                    lines.append(f'api_request_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'api_request_duration_seconds_bucket{{{label},le="+Inf"}} {entry["count"]}')
+                lines.append(f'api_request_duration_seconds_sum{{{label}}} {entry["duration"]:.6f}')
+                lines.append(f'api_request_duration_seconds_count{{{label}}} {entry["count"]}')
+                for status, count in sorted(entry['statuses'].items()):
+                    lines.append(f'api_requests_total{{{label},status="{status}"}} {count}')
+                for name, (count, seconds) in sorted(entry['phases'].items()):
+                    lines.append(f'api_phase_duration_seconds_sum{{{label},phase="{name}"}} {seconds:.6f}')
+                    lines.append(f'api_phase_duration_seconds_count{{{label},phase="{name}"}} {count}')
+                lines.append(f'api_db_queries_total{{{label}}} {entry["db_queries"]}')
+                lines.append(f'api_db_duration_seconds_total{{{label}}} {entry["db_time"]:.6f}')
+                lines.append(f'api_response_bytes_total{{{label}}} {entry["payload_bytes"]}')
+                lines.append(f'api_peak_memory_bytes{{{label}}} {entry["peak_memory"]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MemoryTracer:
+    """Peak memory of requests, traced by one process-wide ``tracemalloc`` session.
+
+    tracemalloc is global, so starting and stopping it per request would let
+    one thread cut off another's measurement. Tracing starts once instead,
+    and a request only reports a peak when no other profiled request ran
+    alongside it, since concurrent requests share the same peak. Under a
+    threaded server overlapping requests therefore report no memory; run
+    single-threaded (e.g. ``runserver --nothreading``) for every request to
+    be measured. Needs ``tracemalloc.reset_peak`` (Python 3.9+).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = set()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, profile):
+        with self.lock:
+            if not self.active:
+                tracemalloc.reset_peak()
+                profile.memory_start = tracemalloc.get_traced_memory()[0]
+            else:
+                for other in self.active:
+                    other.memory_start = None
+            self.active.add(profile)
+
+    def end(self, profile):
+        with self.lock:
+            self.active.discard(profile)
+            if profile.memory_start is None:
+                return None
+            return tracemalloc.get_traced_memory()[1] - profile.memory_start
+
+
+def _payload_bytes(response):
+    if getattr(response, 'streaming', False):
+        return int(response.get('Content-Length') or 0)
+    return len(response.content)
+
+
+def _server_timing(duration, profile, payload_bytes, peak_memory):
+    entries = [f'total;dur={duration * 1000:.1f}']
+    entries.append(f'db;dur={profile.db_time * 1000:.1f};desc="{profile.db_queries} queries"')
+    for name, seconds in profile.spans.items():
+        entries.append(f'{name};dur={seconds * 1000:.1f}')
+    entries.append(f'payload;desc="{payload_bytes} bytes"')
+    if peak_memory is not None:
+        entries.append(f'memory;desc="{peak_memory} bytes peak"')
+    return ', '.join(entries)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        trace_memory = settings.PROFILING_TRACE_MEMORY and hasattr(tracemalloc, 'reset_peak')
+        self.memory = MemoryTracer() if trace_memory else None
+
+    def __call__(self, request):
+        if not request.path.startswith('/api/') or request.path == '/api/metrics/':
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = cProfile.Profile() if settings.PROFILING_CPROFILE_THRESHOLD_MS is not None else None
+        if self.memory:
+            self.memory.begin(profile)
+        start = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile.execute_wrapper))
+                if profiler:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            duration = time.perf_counter() - start
+            peak_memory = self.memory.end(profile) if self.memory else None
+            _current.reset(token)
+
+        payload_bytes = _payload_bytes(response)
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'unresolved'
+        registry.observe(view, response.status_code, duration, profile, payload_bytes, peak_memory)
+        response['Server-Timing'] = _server_timing(duration, profile, payload_bytes, peak_memory)
+
+        if profiler and duration * 1000 >= settings.PROFILING_CPROFILE_THRESHOLD_MS:
+            os.makedirs(settings.PROFILING_CPROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(
+                settings.PROFILING_CPROFILE_DIR, f'{int(time.time() * 1000)}-{view}.prof'
+            ))
+        return response
+
+
+def metrics_view(request):
+    if not settings.PROFILING_ENABLED:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
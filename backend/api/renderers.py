@@ -0,0 +1,90 @@
+"""JSON renderer and parser backed by orjson.
+
+``FastJSONRenderer`` serializes NumPy arrays and scalars directly (NaN is
+written as null), so views can return columns as arrays instead of building
+Python lists first. Views that already hold an encoded body, such as a
+cached payload, wrap it in ``PreEncodedJSON`` and it is sent as is. Without
+orjson both classes fall back to the ``json`` module with a NumPy-aware
+encoder.
+"""
+import numpy as np
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class PreEncodedJSON:
+    """Response data that is already encoded JSON."""
+
+    def __init__(self, content):
+        self.content = content
+
+
+def _numpy_default(obj):
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f':
+            return np.where(np.isnan(obj), None, obj).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.floating) and np.isnan(obj):
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError
+
+
+class NumpyJSONEncoder(JSONEncoder):
+    """DRF's encoder plus NumPy arrays and scalars, for when orjson is missing."""
+
+    def default(self, obj):
+        try:
+            return _numpy_default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+def _orjson_default(obj):
+    # Called for types orjson does not handle natively (object arrays, Decimal, lazy strings...)
+    try:
+        return _numpy_default(obj)
+    except TypeError:
+        return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    encoder_class = NumpyJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, PreEncodedJSON):
+            return data.content
+        if data is None or orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_orjson_default, option=option)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('_', '-') != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+def encode(data):
+    """Encode ``data`` the way API responses are encoded."""
+    return FastJSONRenderer().render(data)
+
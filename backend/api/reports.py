@@ -0,0 +1,206 @@
+"""PDF report rendering, shared by generate_report and the job worker.
+
+Rendered reports are cached on disk by ``(dataset id, REPORT_VERSION)`` and
+served from there; datasets are immutable, so a report (including its
+charts) is drawn at most once per version. Bump ``REPORT_VERSION`` whenever
+the layout changes. Batch exports render the missing reports in a process
+pool and bundle them into one ZIP.
+"""
+import glob
+import os
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from . import downsample
+from .columns import NUMERIC_COLUMNS
+
+REPORT_VERSION = 3
+CHART_POINTS = 400
+CHART_COLORS = ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF']
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#36A2EB')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+])
+
+
+def report_filename(dataset):
+    return f'report_{dataset.name}.pdf'
+
+
+def report_dir():
+    path = os.path.join(settings.MEDIA_ROOT, 'reports', 'cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def report_path(dataset):
+    return os.path.join(report_dir(), f'dataset-{dataset.id}-v{REPORT_VERSION}.pdf')
+
+
+def report_context(dataset):
+    """Collect everything a report needs, so rendering never touches the database."""
+    df = dataset.load_frame(NUMERIC_COLUMNS)
+    return {
+        'name': dataset.name,
+        'summary': dataset.get_summary(),
+        'analytics': dataset.get_analytics(),
+        'trends': downsample.downsample_frame(df, NUMERIC_COLUMNS, CHART_POINTS),
+    }
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:.2f}'
+
+
+def _stats_table(analytics):
+    header = ['Parameter', 'Min', 'Max', 'Mean', 'Std', 'P25', 'Median', 'P75', 'P95']
+    rows = [header]
+    for col in NUMERIC_COLUMNS:
+        stats = analytics['statistics'][f'{col.lower()}_stats']
+        quantiles = stats['quantiles']
+        rows.append([col] + [_fmt(v) for v in (
+            stats['min'], stats['max'], stats['mean'], stats['std'],
+            quantiles['p25'], quantiles['p50'], quantiles['p75'], quantiles['p95'],
+        )])
+    table = Table(rows)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def _type_table(type_distribution):
+    total = sum(type_distribution.values()) or 1
+    rows = [['Equipment Type', 'Count', 'Share']]
+    rows += [[t, str(c), f'{100 * c / total:.1f}%'] for t, c in type_distribution.items()]
+    table = Table(rows)
+    table.setStyle(TABLE_STYLE)
+    return table
+
+
+def _type_charts(type_distribution):
+    types = list(type_distribution.keys())
+    counts = list(type_distribution.values())
+    drawing = Drawing(6.5 * inch, 2.4 * inch)
+
+    bar = VerticalBarChart()
+    bar.x, bar.y = 30, 30
+    bar.width, bar.height = 3.2 * inch, 1.8 * inch
+    bar.data = [counts]
+    bar.categoryAxis.categoryNames = types
+    bar.categoryAxis.labels.angle = 30
+    bar.categoryAxis.labels.boxAnchor = 'ne'
+    bar.valueAxis.valueMin = 0
+    bar.bars[0].fillColor = colors.HexColor(CHART_COLORS[1])
+    drawing.add(bar)
+
+    pie = Pie()
+    pie.x, pie.y = 4.4 * inch, 20
+    pie.width = pie.height = 1.8 * inch
+    pie.data = counts
+    pie.labels = types
+    for i in range(len(counts)):
+        pie.slices[i].fillColor = colors.HexColor(CHART_COLORS[i % len(CHART_COLORS)])
+    drawing.add(pie)
+    return drawing
+
+
+def _trend_chart(trends):
+    drawing = Drawing(6.5 * inch, 2.6 * inch)
+    plot = LinePlot()
+    plot.x, plot.y = 40, 40
+    plot.width, plot.height = 5.2 * inch, 1.9 * inch
+    plot.data = [
+        [(x, y) for x, y in zip(trends[col]['index'], trends[col]['values']) if y is not None]
+        for col in NUMERIC_COLUMNS
+    ]
+    for i, col in enumerate(NUMERIC_COLUMNS):
+        plot.lines[i].strokeColor = colors.HexColor(CHART_COLORS[i])
+        plot.lines[i].strokeWidth = 0.8
+    drawing.add(plot)
+
+    legend = Legend()
+    legend.x, legend.y = 50, 2.5 * inch
+    legend.alignment = 'right'
+    legend.columnMaximum = 1
+    legend.colorNamePairs = [(colors.HexColor(CHART_COLORS[i]), col) for i, col in enumerate(NUMERIC_COLUMNS)]
+    drawing.add(legend)
+    return drawing
+
+
+def write_report(context, path):
+    """Render a report from ``report_context`` output and publish it at ``path``."""
+    summary = context['summary']
+    analytics = context['analytics']
+    styles = getSampleStyleSheet()
+
+    story = [
+        Paragraph(f"Equipment Analysis Report - {escape(context['name'])}", styles['Title']),
+        Paragraph(f"Total Equipment: {summary['total_count']}", styles['Normal']),
+        Paragraph(f"Average Flowrate: {_fmt(summary['avg_flowrate'])}", styles['Normal']),
+        Paragraph(f"Average Pressure: {_fmt(summary['avg_pressure'])}", styles['Normal']),
+        Paragraph(f"Average Temperature: {_fmt(summary['avg_temperature'])}", styles['Normal']),
+        Spacer(1, 12),
+        Paragraph('Parameter Statistics', styles['Heading2']),
+        _stats_table(analytics),
+        Spacer(1, 12),
+        Paragraph('Equipment Type Distribution', styles['Heading2']),
+        _type_table(summary['type_distribution']),
+        Spacer(1, 12),
+        _type_charts(summary['type_distribution']),
+        Paragraph('Parameter Trends', styles['Heading2']),
+        _trend_chart(context['trends']),
+    ]
+
+    # Write to a temporary name first so readers never see a partial file
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    SimpleDocTemplate(tmp_path, pagesize=letter).build(story)
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_report_path(dataset):
+    """Return the cached report for ``dataset``, rendering it on first use."""
+    path = report_path(dataset)
+    if not os.path.exists(path):
+        write_report(report_context(dataset), path)
+    return path
+
+
+def delete_reports(dataset_ids):
+    for dataset_id in dataset_ids:
+        for path in glob.glob(os.path.join(report_dir(), f'dataset-{dataset_id}-v*.pdf')):
+            os.remove(path)
+
+
+def write_report_zip(datasets, file):
+    """Render missing reports in parallel and bundle all of them into a ZIP.
+
+    ``file`` is a path or a writable binary file object.
+    """
+    missing = [d for d in datasets if not os.path.exists(report_path(d))]
+    if missing:
+        contexts = [report_context(d) for d in missing]
+        workers = min(settings.REPORT_WORKERS, len(missing))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_report, contexts, [report_path(d) for d in missing]))
+
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(file, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for dataset in datasets:
+            archive.write(report_path(dataset), arcname=f'{dataset.id}_{report_filename(dataset)}')
+    return file
@@ -0,0 +1,116 @@
+"""Per-user response cache with ETag revalidation.
+
+Cached responses are keyed by the user, the request path and a per-user
+version number. Datasets are immutable, so the version only changes when
+``api.datasets`` adds or prunes datasets; bumping it invalidates every cached
+response of that user at once. The ETag is derived from the same key, so a
+matching ``If-None-Match`` is answered with 304 without running the view.
+
+The bodies live in the ``responses`` cache, which must be shared by the web
+and job worker processes (the default is file-based). The version is a
+``ResponseVersion`` row: a cache may evict entries, and a version that went
+back to 1 would make stale bodies and ETags valid again.
+
+The hit/miss counters are approximate: ``incr`` on the file-based cache is
+an unlocked read-modify-write, so concurrent workers can lose increments.
+They are a rough hit ratio for tuning, not an exact count; an exact one
+would cost a database write on every cache hit.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.response import Response
+
+from .models import ResponseVersion
+from .profiling import span
+from .renderers import encode
+
+COUNTERS = ('hits', 'misses', 'not_modified')
+
+
+def _cache():
+    return caches['responses']
+
+
+def user_version(user_id):
+    # Users without a row have never invalidated anything
+    version = ResponseVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or 1
+
+
+def invalidate_user(user_id):
+    """Drop every cached response of ``user_id`` by bumping its version."""
+    versions = ResponseVersion.objects.filter(user_id=user_id)
+    if versions.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            ResponseVersion.objects.create(user_id=user_id, version=2)
+    except IntegrityError:
+        # Another process created the row first
+        versions.update(version=F('version') + 1)
+
+
+def _record(counter):
+    # Best effort; see the module docstring
+    cache = _cache()
+    key = f'resp-stats:{counter}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_stats():
+    """Approximate hit/miss/304 counters since the cache was last cleared."""
+    cache = _cache()
+    stats = {counter: cache.get(f'resp-stats:{counter}', 0) for counter in COUNTERS}
+    lookups = stats['hits'] + stats['misses'] + stats['not_modified']
+    stats['hit_ratio'] = (stats['hits'] + stats['not_modified']) / lookups if lookups else None
+    return stats
+
+
+def _etag_matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in [tag.strip() for tag in header.split(',')] or header.strip() == '*'
+
+
+def cached_response(view):
+    """Cache the rendered 200 responses of a function-based API view."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        version = user_version(request.user.id)
+        digest = hashlib.sha1(
+            f'resp:{view.__name__}:{request.user.id}:{version}:{request.get_full_path()}'.encode()
+        ).hexdigest()
+        etag = f'"{digest}"'
+
+        if _etag_matches(request, etag):
+            _record('not_modified')
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        cache = _cache()
+        body = cache.get(f'resp:{digest}')
+        if body is None:
+            _record('misses')
+            response = view(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200:
+                return response
+            with span('render'):
+                body = encode(response.data)
+            cache.set(f'resp:{digest}', body, settings.RESPONSE_CACHE_TIMEOUT)
+        else:
+            _record('hits')
+
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
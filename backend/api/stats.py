@@ -0,0 +1,242 @@
+"""Mergeable sufficient statistics for cross-dataset aggregates.
+
+Every dataset stores, per numeric column, its count, mean, sum of squared
+deviations (``m2``), min/max and a fixed-size histogram. Moments from several
+datasets are merged with Chan's parallel algorithm, so the dashboard can
+report combined means, standard deviations and outlier counts in
+O(datasets) without loading any rows.
+
+Quantiles come from the sorted ``values`` themselves while a column has at
+most ``EXACT_QUANTILE_LIMIT`` of them, so they are exact (and match
+``Series.quantile``). Larger columns fall back to a logarithmic bucket
+``sketch``: a value ``x > 0`` is counted in bucket ``ceil(log_gamma(x))``
+(negative values in a mirrored store, ``|x| < SKETCH_MIN_VALUE`` as zero),
+with ``gamma = (1 + a) / (1 - a)``. An estimate is then within a relative
+``a = SKETCH_RELATIVE_ACCURACY`` (1%) of the true value at the requested
+rank. Bucket counts simply add up, so merged sketches do not depend on how
+the rows were chunked.
+"""
+import math
+
+import numpy as np
+
+from .columns import NUMERIC_COLUMNS
+
+STATS_VERSION = 2
+HISTOGRAM_BINS = 256
+STATS_COLUMNS = ['Type'] + NUMERIC_COLUMNS
+EXACT_QUANTILE_LIMIT = 10000
+SKETCH_RELATIVE_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+SKETCH_MIN_VALUE = 1e-9
+
+
+def _sketch_store(magnitudes):
+    indexes, counts = np.unique(np.ceil(np.log(magnitudes) / math.log(SKETCH_GAMMA)), return_counts=True)
+    # String keys so the store survives a JSON round trip unchanged
+    return {str(int(index)): int(count) for index, count in zip(indexes, counts)}
+
+
+def _sketch(values):
+    return {
+        'positive': _sketch_store(values[values >= SKETCH_MIN_VALUE]),
+        'negative': _sketch_store(-values[values <= -SKETCH_MIN_VALUE]),
+        'zero': int((np.abs(values) < SKETCH_MIN_VALUE).sum()),
+    }
+
+
+def column_stats(values):
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return {
+            'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None, 'histogram': [],
+            'values': [], 'sketch': _sketch(values),
+        }
+    mean = float(values.mean())
+    low, high = float(values.min()), float(values.max())
+    counts, _ = np.histogram(values, bins=HISTOGRAM_BINS, range=(low, high))
+    return {
+        'count': int(len(values)),
+        'mean': mean,
+        'm2': float(((values - mean) ** 2).sum()),
+        'min': low,
+        'max': high,
+        'histogram': counts.tolist(),
+        'values': np.sort(values).tolist() if len(values) <= EXACT_QUANTILE_LIMIT else None,
+        'sketch': _sketch(values),
+    }
+
+
+def compute_stats(df):
+    return {
+        'version': STATS_VERSION,
+        'columns': {
+            col: column_stats(df[col].to_numpy(dtype=float)) for col in NUMERIC_COLUMNS
+        },
+        'type_counts': {str(k): int(v) for k, v in df['Type'].value_counts().items()},
+    }
+
+
+def merge_moments(a, b):
+    """Combine two ``{count, mean, m2, min, max}`` moment dicts."""
+    if not b['count']:
+        return dict(a)
+    if not a['count']:
+        return dict(b)
+    count = a['count'] + b['count']
+    delta = b['mean'] - a['mean']
+    return {
+        'count': count,
+        'mean': a['mean'] + delta * b['count'] / count,
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+    }
+
+
+def _rebin(column, edges):
+    """Spread a column histogram over new bin ``edges``, assuming values are
+    uniform within each bin (the same assumption ``count_outside`` makes)."""
+    counts = np.asarray(column['histogram'], dtype=float)
+    if not column['count']:
+        return np.zeros(len(edges) - 1)
+    if column['max'] == column['min']:
+        result = np.zeros(len(edges) - 1)
+        index = np.searchsorted(edges, column['min'], side='right') - 1
+        result[min(max(index, 0), len(result) - 1)] = counts.sum()
+        return result
+    source = np.linspace(column['min'], column['max'], len(counts) + 1)
+    overlap = np.clip(
+        np.minimum(source[1:, None], edges[None, 1:]) - np.maximum(source[:-1, None], edges[None, :-1]),
+        0, None
+    )
+    return (counts[:, None] * overlap / (source[1:] - source[:-1])[:, None]).sum(axis=0)
+
+
+def _merge_sketches(a, b):
+    merged = {'zero': a['zero'] + b['zero']}
+    for sign in ('positive', 'negative'):
+        store = dict(a[sign])
+        for index, count in b[sign].items():
+            store[index] = store.get(index, 0) + count
+        merged[sign] = store
+    return merged
+
+
+def merge_column(a, b):
+    """Merge two column entries, including their histograms and sketches.
+
+    Histograms with different ranges are re-binned over the combined range,
+    so merged bin counts are estimates (and may be fractional).
+    """
+    merged = merge_moments(a, b)
+    merged['sketch'] = _merge_sketches(a['sketch'], b['sketch'])
+    if a['values'] is not None and b['values'] is not None and merged['count'] <= EXACT_QUANTILE_LIMIT:
+        merged['values'] = np.sort(np.concatenate([a['values'], b['values']])).tolist()
+    else:
+        merged['values'] = None
+    if not a['count'] or not b['count']:
+        merged['histogram'] = list((a if a['count'] else b)['histogram'])
+        return merged
+    if merged['max'] == merged['min']:
+        merged['histogram'] = [merged['count']] + [0] * (HISTOGRAM_BINS - 1)
+        return merged
+    edges = np.linspace(merged['min'], merged['max'], HISTOGRAM_BINS + 1)
+    merged['histogram'] = (_rebin(a, edges) + _rebin(b, edges)).tolist()
+    return merged
+
+
+def merge_stats(a, b):
+    """Stats of the rows of ``a`` followed by the rows of ``b``."""
+    return {
+        'version': STATS_VERSION,
+        'columns': {col: merge_column(a['columns'][col], b['columns'][col]) for col in NUMERIC_COLUMNS},
+        'type_counts': merge_type_counts([a, b]),
+    }
+
+
+def _sketch_value(sketch, rank):
+    """Estimate of the value at 0-based ``rank`` (negative, zero, then positive buckets)."""
+    negative = sorted(sketch['negative'].items(), key=lambda item: -int(item[0]))
+    positive = sorted(sketch['positive'].items(), key=lambda item: int(item[0]))
+    seen = 0
+    for index, count in negative:
+        seen += count
+        if rank < seen:
+            return -2 * SKETCH_GAMMA ** int(index) / (SKETCH_GAMMA + 1)
+    seen += sketch['zero']
+    if rank < seen:
+        return 0.0
+    for index, count in positive:
+        seen += count
+        if rank < seen:
+            return 2 * SKETCH_GAMMA ** int(index) / (SKETCH_GAMMA + 1)
+    return None
+
+
+def column_quantile(column, q):
+    """The ``q`` quantile of a column, interpolated linearly like ``Series.quantile``.
+
+    Exact while the column keeps its sorted ``values``; estimated from the
+    sketch otherwise and clamped to the exact min/max.
+    """
+    if not column['count']:
+        return None
+    if column['values'] is not None:
+        return float(np.quantile(column['values'], q))
+    position = q * (column['count'] - 1)
+    lower = _sketch_value(column['sketch'], math.floor(position))
+    upper = _sketch_value(column['sketch'], math.ceil(position))
+    value = lower + (position - math.floor(position)) * (upper - lower)
+    return min(max(value, column['min']), column['max'])
+
+
+def combine(stats_list, col):
+    merged = {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': None, 'max': None}
+    for stats in stats_list:
+        merged = merge_moments(merged, stats['columns'][col])
+    return merged
+
+
+def std(moments):
+    """Sample standard deviation (ddof=1, matching ``Series.std``)."""
+    if moments['count'] < 2:
+        return None
+    return math.sqrt(moments['m2'] / (moments['count'] - 1))
+
+
+def count_outside(stats_list, col, low, high):
+    """Count the values below ``low`` or above ``high``.
+
+    Exact for columns that keep their sorted ``values``. Otherwise bins
+    entirely outside the range are counted exactly and a bin straddling a
+    bound contributes the fraction of its width beyond the bound.
+    """
+    total = 0.0
+    for stats in stats_list:
+        column = stats['columns'][col]
+        if not column['count']:
+            continue
+        if column['values'] is not None:
+            values = np.asarray(column['values'])
+            total += np.searchsorted(values, low) + len(values) - np.searchsorted(values, high, side='right')
+            continue
+        counts = np.asarray(column['histogram'], dtype=float)
+        if column['max'] == column['min']:
+            value = column['min']
+            total += column['count'] if value < low or value > high else 0
+            continue
+        edges = np.linspace(column['min'], column['max'], len(counts) + 1)
+        width = edges[1:] - edges[:-1]
+        below = np.clip((low - edges[:-1]) / width, 0, 1)
+        above = np.clip((edges[1:] - high) / width, 0, 1)
+        total += float((counts * np.minimum(below + above, 1)).sum())
+    return int(round(total))
+
+
+def merge_type_counts(stats_list):
+    type_counts = {}
+    for stats in stats_list:
+        for eq_type, count in stats['type_counts'].items():
+            type_counts[eq_type] = type_counts.get(eq_type, 0) + count
+    return type_counts
@@ -0,0 +1,183 @@
+"""Columnar on-disk storage for uploaded datasets.
+
+Each dataset is stored in its own directory under ``DATASET_STORAGE_ROOT``.
+The rows are split into parts; every part is an ``.npz`` archive holding one
+NumPy array per column, so frames can be rebuilt with ``np.load`` instead of
+parsing JSON into Python dicts. A ``manifest.json`` records the column order,
+the row count of every part and the total row count. Appends add parts and
+rewrite the manifest; existing part files are never changed.
+"""
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def storage_root():
+    return settings.DATASET_STORAGE_ROOT
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def dataset_path(key):
+    return os.path.join(storage_root(), key)
+
+
+def _to_array(series):
+    # Numeric columns are kept as-is; everything else becomes a fixed-width
+    # unicode array so the archive never needs pickle to load.
+    if series.dtype.kind in 'biuf':
+        return series.to_numpy()
+    return series.fillna('').astype(str).to_numpy(dtype=str)
+
+
+class StorageWriter:
+    """Writes a dataset part by part and publishes it with ``commit()``."""
+
+    def __init__(self, key=None):
+        self.key = key or new_key()
+        self.path = dataset_path(self.key)
+        os.makedirs(self.path, exist_ok=True)
+        self.parts = []
+        self.columns = None
+
+    def write_part(self, df, name=None):
+        part = write_part(self.key, df, name or f'part-{len(self.parts):05d}')
+        self.add_part(part, list(df.columns))
+        return part
+
+    def add_part(self, part, columns):
+        if self.columns is None:
+            self.columns = columns
+        self.parts.append(part)
+
+    def commit(self):
+        write_manifest(self.key, self.columns or [], self.parts)
+        return self.key
+
+    def abort(self):
+        delete(self.key)
+
+
+def write_part(key, df, name):
+    """Write one part file and return its manifest entry."""
+    filename = f'{name}.npz'
+    arrays = {col: _to_array(df[col]) for col in df.columns}
+    with open(os.path.join(dataset_path(key), filename), 'wb') as f:
+        np.savez(f, **arrays)
+    return {'file': filename, 'rows': len(df)}
+
+
+def write_manifest(key, columns, parts):
+    manifest = {
+        'columns': columns,
+        'parts': parts,
+        'rows': sum(part['rows'] for part in parts),
+    }
+    tmp_path = os.path.join(dataset_path(key), MANIFEST_NAME + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(dataset_path(key), MANIFEST_NAME))
+    return manifest
+
+
+def read_manifest(key):
+    with open(os.path.join(dataset_path(key), MANIFEST_NAME)) as f:
+        return json.load(f)
+
+
+def _read_part(key, part, columns):
+    with np.load(os.path.join(dataset_path(key), part['file'])) as archive:
+        return {col: archive[col] for col in columns}
+
+
+def read_frame(key, columns=None):
+    """Load a stored dataset (optionally only some columns) as a DataFrame."""
+    manifest = read_manifest(key)
+    columns = manifest['columns'] if columns is None else list(columns)
+    parts = [_read_part(key, part, columns) for part in manifest['parts']]
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame({
+        col: np.concatenate([part[col] for part in parts]) for col in columns
+    })
+
+
+def read_rows(key, indices, columns=None):
+    """Load only the rows at the given sorted positional ``indices``.
+
+    Parts that contain none of the requested rows are never opened.
+    """
+    manifest = read_manifest(key)
+    columns = manifest['columns'] if columns is None else list(columns)
+    indices = np.asarray(indices, dtype=np.int64)
+    pieces = []
+    start = 0
+    for part in manifest['parts']:
+        stop = start + part['rows']
+        lo, hi = np.searchsorted(indices, [start, stop])
+        if hi > lo:
+            arrays = _read_part(key, part, columns)
+            local = indices[lo:hi] - start
+            pieces.append({col: arrays[col][local] for col in columns})
+        start = stop
+    if not pieces:
+        return pd.DataFrame(columns=columns)
+    return pd.DataFrame({
+        col: np.concatenate([piece[col] for piece in pieces]) for col in columns
+    })
+
+
+def write_frame(df, key=None):
+    """Store a complete DataFrame as a single part and return its key."""
+    writer = StorageWriter(key)
+    writer.write_part(df)
+    return writer.commit()
+
+
+def fork(key):
+    """Copy a stored dataset to a new key and return it.
+
+    Part files are never modified after they are written, so they are
+    hard-linked when the filesystem allows it.
+    """
+    new = new_key()
+    os.makedirs(dataset_path(new))
+    manifest = read_manifest(key)
+    for part in manifest['parts']:
+        source = os.path.join(dataset_path(key), part['file'])
+        target = os.path.join(dataset_path(new), part['file'])
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    write_manifest(new, manifest['columns'], manifest['parts'])
+    return new
+
+
+def move_parts(source, target, parts):
+    """Move part files written under key ``source`` into key ``target``."""
+    for part in parts:
+        os.replace(os.path.join(dataset_path(source), part['file']), os.path.join(dataset_path(target), part['file']))
+    return parts
+
+
+def delete_parts(key, parts):
+    for part in parts:
+        try:
+            os.remove(os.path.join(dataset_path(key), part['file']))
+        except FileNotFoundError:
+            pass
+
+
+def delete(key):
+    if key:
+        shutil.rmtree(dataset_path(key), ignore_errors=True)
@@ -0,0 +1,31 @@
+"""Synthetic equipment CSVs for benchmarks."""
+import numpy as np
+import pandas as pd
+
+EQUIPMENT_TYPES = [
+    'Pump', 'Valve', 'Compressor', 'HeatExchanger', 'Reactor', 'Condenser',
+    'Tank', 'Mixer', 'Boiler', 'Separator', 'Filter', 'Dryer',
+]
+
+
+def synthetic_frame(rows, seed=0, start=0):
+    rng = np.random.default_rng(seed)
+    # Zipf-like weights so a few types dominate, as in real plants
+    weights = 1.0 / np.arange(1, len(EQUIPMENT_TYPES) + 1)
+    types = rng.choice(EQUIPMENT_TYPES, size=rows, p=weights / weights.sum())
+    ids = np.arange(start, start + rows)
+    return pd.DataFrame({
+        'Equipment Name': pd.Series(types).str.cat(ids.astype(str), sep='-'),
+        'Type': types,
+        'Flowrate': np.round(rng.lognormal(mean=4.6, sigma=0.35, size=rows), 1),
+        'Pressure': np.round(rng.gamma(shape=9.0, scale=0.7, size=rows), 2),
+        'Temperature': np.round(rng.normal(loc=115, scale=18, size=rows), 1),
+    })
+
+
+def write_synthetic_csv(path, rows, seed=0, chunk_rows=1_000_000):
+    """Write ``rows`` synthetic rows to ``path`` without holding them all in memory."""
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        frame = synthetic_frame(min(chunk_rows, rows - start), seed=seed + i, start=start)
+        frame.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return path
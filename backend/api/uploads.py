@@ -0,0 +1,39 @@
+"""Upload handlers."""
+import hashlib
+
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Computes the SHA-256 of each uploaded file while it streams in.
+
+    It must come first in ``FILE_UPLOAD_HANDLERS``: chunks are passed through
+    unchanged to the handlers that actually store the file, and the digests
+    are left on ``request.upload_hashes`` keyed by form field name.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_hashes'):
+            self.request.upload_hashes = {}
+        self.request.upload_hashes[self.field_name] = self.hasher.hexdigest()
+        return None
+
+
+def upload_sha256(request, field_name, file):
+    """Return the digest recorded by ``HashingUploadHandler``, hashing ``file`` if missing."""
+    digest = getattr(request, 'upload_hashes', {}).get(field_name)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
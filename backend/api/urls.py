@@ -1,11 +1,24 @@
 from django.urls import path
-from . import views
+from . import profiling, views
 
 urlpatterns = [
     path('register/', views.register_user, name='register_user'),
     path('login/', views.login_user, name='login_user'),
+    path('logout/', views.logout_user, name='logout_user'),
     path('upload/', views.upload_csv, name='upload_csv'),
     path('history/', views.get_history, name='get_history'),
     path('dataset/<int:dataset_id>/', views.get_dataset, name='get_dataset'),
+    path('dataset/<int:dataset_id>/append/', views.append_dataset, name='append_dataset'),
+    path('dataset/<int:dataset_id>/rows/', views.get_dataset_rows, name='get_dataset_rows'),
+    path('dataset/<int:dataset_id>/trends/', views.get_dataset_trends, name='get_dataset_trends'),
+    path('dataset/<int:dataset_id>/anomalies/', views.get_dataset_anomalies, name='get_dataset_anomalies'),
+    path('dataset/<int:dataset_id>/groupby/', views.get_dataset_groupby, name='get_dataset_groupby'),
+    path('compare/', views.compare_datasets, name='compare_datasets'),
     path('report/', views.generate_report, name='generate_report'),
+    path('report/batch/', views.generate_report_batch, name='generate_report_batch'),
+    path('dashboard/', views.get_dashboard, name='get_dashboard'),
+    path('cache/stats/', views.get_response_cache_stats, name='get_response_cache_stats'),
+    path('jobs/<int:job_id>/', views.get_job, name='get_job'),
+    path('jobs/<int:job_id>/result/', views.get_job_result, name='get_job_result'),
+    path('metrics/', profiling.metrics_view, name='metrics'),
 ]
\ No newline at end of file
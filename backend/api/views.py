@@ -1,16 +1,28 @@
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.parsers import FileUploadParser, MultiPartParser
 from rest_framework import status
-from django.http import HttpResponse
+from rest_framework.authtoken.models import Token
+from django.http import FileResponse
+from django.urls import reverse
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-import pandas as pd
-import json
-from .models import Dataset
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import io
+from django.conf import settings
+from django.core.cache import cache
+import numpy as np
+from .models import Dataset, Job
+from .columns import NUMERIC_COLUMNS, REQUIRED_COLUMNS
+from .datasets import append_rows, create_dataset, create_from_blob, find_blob
+from .uploads import upload_sha256
+from .response_cache import cached_response, get_stats as get_cache_stats
+from .authentication import invalidate_token
+from .profiling import span
+from .renderers import PreEncodedJSON, encode
+from . import anomalies, compare, downsample, groupby, jobs, reports, stats
+import hashlib
+import tempfile
+import time
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -36,50 +48,89 @@ def login_user(request):
     
     user = authenticate(username=username, password=password)
     if user:
-        return Response({'message': 'Login successful'}, status=status.HTTP_200_OK)
+        # The password is checked once here; later requests send the token
+        token, _ = Token.objects.get_or_create(user=user)
+        return Response({'message': 'Login successful', 'token': token.key}, status=status.HTTP_200_OK)
     else:
         return Response({'error': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+def logout_user(request):
+    Token.objects.filter(user=request.user).delete()
+    if isinstance(request.auth, Token):
+        invalidate_token(request.auth.key)
+    return Response({'message': 'Logged out'})
+
+def job_accepted(job):
+    return Response({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('get_job', args=[job.id]),
+        'result_url': reverse('get_job_result', args=[job.id])
+    }, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+# Multipart forms, or the raw file as the body with a Content-Disposition filename
+@parser_classes([MultiPartParser, FileUploadParser])
 def upload_csv(request):
     if 'file' not in request.FILES:
         return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
     
     file = request.FILES['file']
+    with span('hash'):
+        sha256 = upload_sha256(request, 'file', file)
+    
+    # Identical bytes were parsed before: reuse that storage without queuing a job
+    blob = find_blob(sha256)
+    dataset = create_from_blob(request.user, file.name, blob) if blob else None
+    if dataset is not None:
+        return Response({
+            'id': dataset.id,
+            'summary': dataset.get_summary()
+        })
+    
+    if settings.ASYNC_JOBS:
+        job = jobs.enqueue(request.user, Job.KIND_UPLOAD, {
+            'name': file.name,
+            'path': jobs.stage_upload(file),
+            'sha256': sha256
+        })
+        return job_accepted(job)
+    
     try:
-        df = pd.read_csv(file)
-        
-        # Validate required columns
-        required_cols = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-        if not all(col in df.columns for col in required_cols):
-            return Response({'error': 'Missing required columns'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Calculate summary statistics
-        summary = {
-            'total_count': len(df),
-            'avg_flowrate': df['Flowrate'].mean(),
-            'avg_pressure': df['Pressure'].mean(),
-            'avg_temperature': df['Temperature'].mean(),
-            'type_distribution': df['Type'].value_counts().to_dict()
-        }
-        
-        # Save dataset (keep only last 5 for this user)
-        Dataset.objects.create(
-            user=request.user,
-            name=file.name,
-            data=df.to_json(orient='records'),
-            summary=json.dumps(summary)
-        )
-        
-        # Keep only last 5 datasets for this user
-        user_datasets = Dataset.objects.filter(user=request.user)
-        if len(user_datasets) > 5:
-            user_datasets[5:].delete()
+        # Stream the file into storage and keep only the last 5 datasets
+        dataset = create_dataset(request.user, file.name, file, sha256)
         
+        # Rows are served separately by get_dataset_rows
         return Response({
-            'data': df.to_dict('records'),
-            'summary': summary
+            'id': dataset.id,
+            'summary': dataset.get_summary()
+        })
+    
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+# Multipart forms, or the raw file as the body with a Content-Disposition filename
+@parser_classes([MultiPartParser, FileUploadParser])
+def append_dataset(request, dataset_id):
+    if 'file' not in request.FILES:
+        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        # Only the new rows are parsed; statistics are merged incrementally
+        dataset = append_rows(dataset, request.FILES['file'])
+        return Response({
+            'id': dataset.id,
+            'summary': dataset.get_summary()
         })
     
     except Exception as e:
@@ -87,8 +138,11 @@ def upload_csv(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response
 def get_history(request):
-    datasets = Dataset.objects.filter(user=request.user)[:5]
+    datasets = Dataset.objects.filter(user=request.user).only(
+        'id', 'name', 'uploaded_at', 'summary'
+    )[:settings.HISTORY_LIMIT]
     history = []
     for dataset in datasets:
         summary = dataset.get_summary()
@@ -106,128 +160,373 @@ def get_history(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response
 def get_dataset(request, dataset_id):
     try:
-        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
-        data = dataset.get_data()
-        summary = dataset.get_summary()
-        
-        # Generate analytics data for charts
-        df = pd.DataFrame(data)
-        analytics = {
-            'type_distribution': summary['type_distribution'],
-            'parameter_trends': {
-                'equipment_names': [item['Equipment Name'] for item in data],
-                'flowrates': [item['Flowrate'] for item in data],
-                'pressures': [item['Pressure'] for item in data],
-                'temperatures': [item['Temperature'] for item in data]
-            },
-            'statistics': {
-                'flowrate_stats': {
-                    'min': df['Flowrate'].min(),
-                    'max': df['Flowrate'].max(),
-                    'mean': df['Flowrate'].mean(),
-                    'std': df['Flowrate'].std()
-                },
-                'pressure_stats': {
-                    'min': df['Pressure'].min(),
-                    'max': df['Pressure'].max(),
-                    'mean': df['Pressure'].mean(),
-                    'std': df['Pressure'].std()
-                },
-                'temperature_stats': {
-                    'min': df['Temperature'].min(),
-                    'max': df['Temperature'].max(),
-                    'mean': df['Temperature'].mean(),
-                    'std': df['Temperature'].std()
-                }
-            }
-        }
+        dataset = Dataset.objects.defer('stats').get(id=dataset_id, user=request.user)
         
+        # Analytics are precomputed at upload; trend series come from get_dataset_trends
         return Response({
-            'data': data,
-            'summary': summary,
-            'analytics': analytics
+            'id': dataset.id,
+            'summary': dataset.get_summary(),
+            'analytics': dataset.get_analytics()
         })
     except Dataset.DoesNotExist:
         return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response
+def get_dataset_rows(request, dataset_id):
+    try:
+        dataset = Dataset.objects.select_related('blob').defer('analytics', 'stats').get(
+            id=dataset_id, user=request.user
+        )
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        offset = max(0, int(request.query_params.get('offset', 0)))
+        limit = int(request.query_params.get('limit', settings.ROWS_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(1, limit), settings.ROWS_PAGE_MAX)
+    
+    columns = dataset.get_columns()
+    fields = request.query_params.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else columns
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        return Response({'error': f'Unknown fields: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    sort = request.query_params.get('sort')
+    if sort and sort.lstrip('-') not in columns:
+        return Response({'error': f'Unknown sort field: {sort.lstrip("-")}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Resolve the matching row positions, then read only the parts that hold the page
+    types = request.query_params.get('type')
+    if types:
+        type_column = dataset.load_frame(['Type'])['Type']
+        matches = np.flatnonzero(type_column.isin(types.split(',')).to_numpy())
+    else:
+        matches = np.arange(dataset.get_summary()['total_count'])
+    if sort:
+        # Vectorized sort over one column; ?sort=-Field sorts descending
+        values = dataset.load_frame([sort.lstrip('-')]).iloc[:, 0].to_numpy()[matches]
+        order = np.argsort(values, kind='stable')
+        matches = matches[order[::-1] if sort.startswith('-') else order]
+    page = matches[offset:offset + limit]
+    positions = np.sort(page)
+    rows = dataset.load_rows(positions, fields)
+    if sort:
+        rows = rows.iloc[np.searchsorted(positions, page)]
+    
+    next_offset = offset + len(page)
+    response = {
+        'count': len(matches),
+        'offset': offset,
+        'limit': limit,
+        'next_offset': next_offset if next_offset < len(matches) else None,
+        'fields': fields
+    }
+    # ?layout=columns returns one list per field, which clients can turn into arrays directly;
+    # the arrays are serialized as they are, without a Python list per column
+    if request.query_params.get('layout') == 'columns':
+        response['columns'] = {field: rows[field].to_numpy() for field in fields}
+    else:
+        response['results'] = rows.to_dict('records')
+    return Response(response)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response
+def get_dataset_trends(request, dataset_id):
+    try:
+        dataset = Dataset.objects.select_related('blob').only(
+            'id', 'summary', 'blob__storage_key'
+        ).get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        points = int(request.query_params.get('points', settings.TRENDS_DEFAULT_POINTS))
+    except ValueError:
+        return Response({'error': 'points must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    points = min(max(2, points), settings.TRENDS_MAX_POINTS)
+    
+    # The row count is part of the key so appended rows never hit a stale entry
+    total_count = dataset.get_summary()['total_count']
+    cache_key = f'trends-json:{dataset.storage_key}:{total_count}:{points}'
+    # Stored encoded, so a hit skips serializing the series again
+    body = cache.get(cache_key)
+    if body is None:
+        df = dataset.load_frame(NUMERIC_COLUMNS)
+        trends = {
+            'points': points,
+            'total_count': len(df),
+            'method': 'minmax',
+            'series': downsample.downsample_frame(df, NUMERIC_COLUMNS, points)
+        }
+        body = encode(trends)
+        cache.set(cache_key, body, settings.TRENDS_CACHE_TIMEOUT)
+    return Response(PreEncodedJSON(body))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response
+def get_dataset_anomalies(request, dataset_id):
+    try:
+        dataset = Dataset.objects.select_related('blob').only(
+            'id', 'summary', 'blob__storage_key'
+        ).get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        threshold = float(request.query_params.get('threshold', settings.ANOMALY_THRESHOLD))
+        offset = max(0, int(request.query_params.get('offset', 0)))
+        limit = int(request.query_params.get('limit', settings.ANOMALIES_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'threshold must be a number; offset and limit integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 0 < threshold < float('inf'):
+        return Response({'error': 'threshold must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = min(max(1, limit), settings.ROWS_PAGE_MAX)
+    
+    # Scores are computed once per dataset and threshold; pages slice the cached result
+    total_count = dataset.get_summary()['total_count']
+    cache_key = f'anomalies:{dataset.storage_key}:{total_count}:{threshold}'
+    result = cache.get(cache_key)
+    if result is None:
+        df = dataset.load_frame(['Type'] + NUMERIC_COLUMNS)
+        with span('stats'):
+            result = anomalies.detect(df, threshold)
+        cache.set(cache_key, result, settings.ANOMALY_CACHE_TIMEOUT)
+    
+    # Only the rows on this page are read back from storage
+    page = result['positions'][offset:offset + limit]
+    positions = np.sort(page)
+    rows = dataset.load_rows(positions, REQUIRED_COLUMNS).iloc[np.searchsorted(positions, page)]
+    
+    stop = offset + len(page)
+    anomaly_count = len(result['positions'])
+    return Response({
+        'method': 'median_mad',
+        'threshold': threshold,
+        'total_count': result['total_count'],
+        'anomaly_count': anomaly_count,
+        'offset': offset,
+        'limit': limit,
+        'next_offset': stop if stop < anomaly_count else None,
+        'baselines': anomalies.baselines(result),
+        'anomalies': anomalies.anomaly_rows(result, offset, stop, rows)
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response
+def get_dataset_groupby(request, dataset_id):
+    try:
+        dataset = Dataset.objects.select_related('blob').only(
+            'id', 'summary', 'blob__storage_key'
+        ).get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    columns = dataset.get_columns()
+    by = request.query_params.get('by', 'Type')
+    if by not in columns or by in NUMERIC_COLUMNS:
+        return Response({'error': f'Cannot group by: {by}'}, status=status.HTTP_400_BAD_REQUEST)
+    fields = request.query_params.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else NUMERIC_COLUMNS
+    unknown = [f for f in fields if f not in NUMERIC_COLUMNS]
+    if unknown:
+        return Response({'error': f'Unknown fields: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        metrics = groupby.parse_metrics(request.query_params.get('metrics'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Memoized per dataset contents, key column, fields and metrics
+    total_count = dataset.get_summary()['total_count']
+    spec = hashlib.sha1(f'{by}|{",".join(fields)}|{",".join(metrics)}'.encode()).hexdigest()
+    cache_key = f'groupby:{dataset.storage_key}:{total_count}:{spec}'
+    result = cache.get(cache_key)
+    if result is None:
+        df = dataset.load_frame([by] + fields)
+        if df[by].nunique(dropna=False) > settings.GROUPBY_MAX_GROUPS:
+            return Response(
+                {'error': f'More than {settings.GROUPBY_MAX_GROUPS} groups; use /rows/ instead'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with span('stats'):
+            result = groupby.group_stats(df, by, fields, metrics)
+        cache.set(cache_key, result, settings.GROUPBY_CACHE_TIMEOUT)
+    return Response(result)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response
+def compare_datasets(request):
+    try:
+        ids = [int(i) for i in request.query_params.get('ids', '').split(',') if i.strip()]
+        top = int(request.query_params.get('top', settings.COMPARE_TOP_DEFAULT))
+        offset = max(0, int(request.query_params.get('offset', 0)))
+        limit = int(request.query_params.get('limit', settings.ROWS_PAGE_SIZE))
+    except ValueError:
+        return Response({'error': 'ids, top, offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 2 <= len(ids) <= settings.COMPARE_MAX_DATASETS:
+        return Response(
+            {'error': f'Pass between 2 and {settings.COMPARE_MAX_DATASETS} dataset ids'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    top = min(max(1, top), settings.COMPARE_TOP_MAX)
+    limit = min(max(1, limit), settings.ROWS_PAGE_MAX)
+    
+    found = Dataset.objects.filter(user=request.user, id__in=ids).select_related('blob').only(
+        'id', 'blob__storage_key'
+    ).in_bulk()
+    missing = [str(i) for i in ids if i not in found]
+    if missing:
+        return Response({'error': f'Datasets not found: {", ".join(missing)}'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Snapshots are loaded one at a time, in the order given
+    with span('stats'):
+        result = compare.compare([found[i] for i in ids], top, offset, limit)
+    return Response(result)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def generate_report(request):
     dataset_id = request.data.get('dataset_id')
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
-        summary = dataset.get_summary()
-        
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        
-        p.drawString(100, 750, f"Equipment Analysis Report - {dataset.name}")
-        p.drawString(100, 720, f"Total Equipment: {summary['total_count']}")
-        p.drawString(100, 700, f"Average Flowrate: {summary['avg_flowrate']:.2f}")
-        p.drawString(100, 680, f"Average Pressure: {summary['avg_pressure']:.2f}")
-        p.drawString(100, 660, f"Average Temperature: {summary['avg_temperature']:.2f}")
+        if settings.ASYNC_JOBS:
+            return job_accepted(jobs.enqueue(request.user, Job.KIND_REPORT, {'dataset_id': dataset.id}))
         
-        y = 620
-        p.drawString(100, y, "Equipment Type Distribution:")
-        for eq_type, count in summary['type_distribution'].items():
-            y -= 20
-            p.drawString(120, y, f"{eq_type}: {count}")
-        
-        p.save()
-        buffer.seek(0)
-        
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="report_{dataset.name}.pdf"'
-        return response
+        # Served from the on-disk report cache; rendered on first request only
+        return FileResponse(open(reports.get_report_path(dataset), 'rb'), as_attachment=True,
+                            filename=reports.report_filename(dataset), content_type='application/pdf')
         
     except Dataset.DoesNotExist:
         return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_report_batch(request):
+    dataset_ids = request.data.get('dataset_ids')
+    if not isinstance(dataset_ids, list) or not dataset_ids:
+        return Response({'error': 'dataset_ids must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(dataset_ids) > settings.REPORT_BATCH_MAX:
+        return Response({'error': f'At most {settings.REPORT_BATCH_MAX} datasets per batch'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        # 1 and "1" name the same dataset
+        dataset_ids = set(int(dataset_id) for dataset_id in dataset_ids)
+    except (TypeError, ValueError):
+        return Response({'error': 'dataset_ids must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    datasets = list(Dataset.objects.filter(id__in=dataset_ids, user=request.user))
+    if len(datasets) != len(dataset_ids):
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if settings.ASYNC_JOBS:
+        return job_accepted(jobs.enqueue(request.user, Job.KIND_REPORT_BATCH, {'dataset_ids': [d.id for d in datasets]}))
+    
+    # Written through the open file: Windows cannot reopen a NamedTemporaryFile
+    archive = tempfile.NamedTemporaryFile(suffix='.zip')
+    reports.write_report_zip(datasets, archive)
+    archive.seek(0)
+    return FileResponse(archive, as_attachment=True, filename='reports.zip', content_type='application/zip')
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response
 def get_dashboard(request):
     try:
-        datasets = Dataset.objects.filter(user=request.user)[:5]
+        datasets = Dataset.objects.filter(user=request.user).only(
+            'id', 'summary', 'stats'
+        )[:settings.HISTORY_LIMIT]
         if not datasets:
             return Response({'message': 'No data available'})
         
-        # Aggregate data from all datasets
-        all_data = []
-        total_equipment = 0
-        type_counts = {}
-        
-        for dataset in datasets:
-            data = dataset.get_data()
-            summary = dataset.get_summary()
-            all_data.extend(data)
-            total_equipment += summary['total_count']
-            
-            for eq_type, count in summary['type_distribution'].items():
-                type_counts[eq_type] = type_counts.get(eq_type, 0) + count
+        # Merge the per-dataset sufficient statistics; no rows are loaded
+        with span('stats'):
+            stats_list = [dataset.get_stats() for dataset in datasets]
+            type_counts = stats.merge_type_counts(stats_list)
+            flowrate = stats.combine(stats_list, 'Flowrate')
+            flowrate_std = stats.std(flowrate) or 0.0
+            low = flowrate['mean'] - 2 * flowrate_std
+            high = flowrate['mean'] + 2 * flowrate_std
+            outliers = stats.count_outside(stats_list, 'Flowrate', low, high)
         
         # Calculate smart insights
-        df = pd.DataFrame(all_data)
-        
         dashboard_data = {
             'overview': {
-                'total_equipment': total_equipment,
+                'total_equipment': sum(dataset.get_summary()['total_count'] for dataset in datasets),
                 'total_datasets': len(datasets),
                 'equipment_types': len(type_counts),
-                'avg_flowrate': df['Flowrate'].mean(),
-                'avg_pressure': df['Pressure'].mean(),
-                'avg_temperature': df['Temperature'].mean()
+                'avg_flowrate': flowrate['mean'],
+                'avg_pressure': stats.combine(stats_list, 'Pressure')['mean'],
+                'avg_temperature': stats.combine(stats_list, 'Temperature')['mean']
             },
             'type_distribution': type_counts,
             'insights': {
                 'most_common_type': max(type_counts, key=type_counts.get) if type_counts else 'None',
-                'efficiency_score': min(100, max(0, 100 - df['Flowrate'].std())),
-                'outliers': len(df[abs(df['Flowrate'] - df['Flowrate'].mean()) > 2 * df['Flowrate'].std()])
+                'efficiency_score': min(100, max(0, 100 - flowrate_std)),
+                'outliers': outliers
             }
         }
         
         return Response(dashboard_data)
         
     except Exception as e:
-        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_job(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id, user=request.user)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Long-poll: ?wait=N holds the request until the job finishes or N seconds pass
+    try:
+        wait = min(float(request.query_params.get('wait', 0)), settings.JOB_MAX_WAIT)
+    except ValueError:
+        return Response({'error': 'wait must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+    if job.status == Job.STATUS_RUNNING and jobs.reap_stale():
+        job.refresh_from_db()
+    deadline = time.monotonic() + wait
+    while not job.is_finished and time.monotonic() < deadline:
+        time.sleep(settings.JOB_POLL_INTERVAL)
+        job.refresh_from_db()
+    
+    return Response(jobs.job_to_dict(job))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_job_result(request, job_id):
+    try:
+        job = Job.objects.get(id=job_id, user=request.user)
+    except Job.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if job.status == Job.STATUS_FAILED:
+        return Response({'error': job.error}, status=status.HTTP_400_BAD_REQUEST)
+    if job.status != Job.STATUS_SUCCEEDED:
+        return Response(jobs.job_to_dict(job), status=status.HTTP_202_ACCEPTED)
+    
+    result = job.get_result()
+    if job.result_file:
+        content_type = 'application/zip' if job.result_file.endswith('.zip') else 'application/pdf'
+        try:
+            file = open(job.result_file, 'rb')
+        except FileNotFoundError:
+            return Response({'error': 'The job result is no longer available'}, status=status.HTTP_410_GONE)
+        return FileResponse(file, as_attachment=True, filename=result['filename'], content_type=content_type)
+    return Response(result)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_response_cache_stats(request):
+    return Response(get_cache_stats())
\ No newline at end of file
@@ -16,11 +16,13 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'corsheaders',
     'api',
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,6 +60,25 @@ DATABASES = {
     )
 }
 
+# 'responses' is shared with the job workers and 'auth' with the other web
+# workers, so neither may be process-local
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'equipment-analyzer',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('RESPONSE_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'responses')),
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('AUTH_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'auth')),
+    },
+}
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -66,23 +87,108 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
+
+# Hash uploads while they stream in so duplicates can skip parsing (see api.uploads)
+FILE_UPLOAD_HANDLERS = [
+    'api.uploads.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'api.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson-backed JSON (see api.renderers); falls back to json when orjson is missing
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Seconds a resolved API token stays in the 'auth' cache (see api.authentication).
+# Logout, deactivation and deletion through the ORM invalidate it at once;
+# changes made directly in the database take up to this long to apply.
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['ETag', 'Server-Timing']
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# Columnar dataset storage (see api.storage)
+DATASET_STORAGE_ROOT = os.environ.get('DATASET_STORAGE_ROOT', os.path.join(MEDIA_ROOT, 'datasets'))
+
+# Number of datasets kept per user
+HISTORY_LIMIT = 5
+
+# Background jobs (see api.jobs); workers run with `python manage.py run_jobs`
+ASYNC_JOBS = os.environ.get('ASYNC_JOBS', 'True') == 'True'
+JOB_MAX_WAIT = 30  # longest ?wait= long-poll in seconds
+JOB_POLL_INTERVAL = 0.5
+# Workers touch their running job this often; jobs without a heartbeat for
+# JOB_STALE_TIMEOUT seconds are failed (their worker is assumed dead)
+JOB_HEARTBEAT_INTERVAL = 30
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 15 * 60))
+# Finished jobs and their report/ZIP files are deleted after this many seconds
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 24 * 60 * 60))
+
+# PDF reports (see api.reports)
+REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS', min(4, os.cpu_count() or 1)))
+REPORT_BATCH_MAX = 50
+
+# Rows per chunk when streaming CSV uploads (see api.ingest)
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 100000))
+
+# Uploads at least this many bytes are parsed by a process pool
+PARALLEL_INGEST_THRESHOLD = int(os.environ.get('PARALLEL_INGEST_THRESHOLD', 256 * 1024 * 1024))
+PARALLEL_INGEST_WORKERS = int(os.environ.get('PARALLEL_INGEST_WORKERS', os.cpu_count() or 1))
+
+# Pagination for /api/dataset/<id>/rows/
+ROWS_PAGE_SIZE = 1000
+ROWS_PAGE_MAX = 10000
+
+# Downsampled trend series for /api/dataset/<id>/trends/
+TRENDS_DEFAULT_POINTS = 1000
+TRENDS_MAX_POINTS = 10000
+TRENDS_CACHE_TIMEOUT = 60 * 60
+
+# Per-type anomaly detection for /api/dataset/<id>/anomalies/ (see api.anomalies)
+ANOMALY_THRESHOLD = 3.5  # robust z-score above which a value is flagged
+ANOMALIES_PAGE_SIZE = 100
+ANOMALY_CACHE_TIMEOUT = 60 * 60
+
+# Grouped statistics for /api/dataset/<id>/groupby/ (see api.groupby)
+GROUPBY_MAX_GROUPS = 10000
+GROUPBY_CACHE_TIMEOUT = 60 * 60
+
+# Snapshot comparison for /api/compare/ (see api.compare)
+COMPARE_MAX_DATASETS = 10
+COMPARE_TOP_DEFAULT = 10
+COMPARE_TOP_MAX = 100
+
+# Request profiling (see api.profiling); off unless PROFILING_ENABLED=True
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_TRACE_MEMORY = os.environ.get('PROFILING_TRACE_MEMORY', 'False') == 'True'
+# Dump a cProfile file for requests slower than this many milliseconds
+PROFILING_CPROFILE_THRESHOLD_MS = (
+    float(os.environ['PROFILING_CPROFILE_THRESHOLD_MS'])
+    if os.environ.get('PROFILING_CPROFILE_THRESHOLD_MS') else None
+)
+PROFILING_CPROFILE_DIR = os.environ.get('PROFILING_CPROFILE_DIR', os.path.join(BASE_DIR, '.cache', 'profiles'))
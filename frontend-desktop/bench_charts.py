@@ -0,0 +1,91 @@
+"""Render-time benchmark for the AnalyticsWindow trend chart.
+
+Compares the old path (a new figure with 'o-' markers and every point) with
+the decimated, artist-reusing path in ``charts``, offscreen with the Agg
+backend. pyqtgraph is measured too when it and PyQt5 are installed.
+
+    python bench_charts.py --points 10000,100000,1000000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import charts
+
+def synthetic_series(points, seed=0):
+    rng = np.random.default_rng(seed)
+    index = np.arange(points)
+    return {
+        'Flowrate': {'index': index, 'values': 100 + np.cumsum(rng.normal(0, 1, points))},
+        'Pressure': {'index': index, 'values': 6 + rng.gamma(9.0, 0.7, points) / 10},
+        'Temperature': {'index': index, 'values': rng.normal(115, 18, points)},
+    }
+
+def legacy_render(series, width):
+    figure = Figure(figsize=(width / 100, 4), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    for (name, color), marker in zip(charts.SERIES, ['o-', 's-', '^-']):
+        ax.plot(series[name]['index'], series[name]['values'], marker, label=name, color=color)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    canvas.draw()
+
+def fast_plot(width):
+    figure = Figure(figsize=(width / 100, 4), dpi=100)
+    FigureCanvasAgg(figure)
+    return charts.MatplotlibTrendPlot(figure.add_subplot(111))
+
+def pyqtgraph_plot(width):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    plot = charts.PyqtgraphTrendPlot()
+    plot.widget.resize(width, 400)
+    return app, plot
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--points', default='10000,100000,1000000')
+    parser.add_argument('--width', type=int, default=1200, help='Plot width in pixels')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy-above', type=int, default=1000000,
+                        help='Skip the slow marker path above this many points')
+    args = parser.parse_args()
+
+    print(f"{'points':>10s} {'renderer':>22s} {'ms':>10s}")
+    for points in (int(p) for p in args.points.split(',')):
+        series = synthetic_series(points)
+        results = {}
+        if points <= args.skip_legacy_above:
+            results['legacy markers'] = best_of(args.repeat, lambda: legacy_render(series, args.width))
+
+        plot = fast_plot(args.width)
+        results['fast (first draw)'] = best_of(1, lambda: plot.set_series(series, args.width))
+        results['fast (update)'] = best_of(args.repeat, lambda: plot.set_series(series, args.width))
+
+        if charts.pyqtgraph is not None:
+            os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            app, qt_plot = pyqtgraph_plot(args.width)
+
+            def render():
+                qt_plot.set_series(series, args.width)
+                qt_plot.widget.grab()  # force a paint
+            results['pyqtgraph (update)'] = best_of(args.repeat, render)
+
+        for name, ms in results.items():
+            print(f'{points:10d} {name:>22s} {ms:10.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Trend chart rendering for AnalyticsWindow.
+
+Series are min/max-decimated to about two points per horizontal pixel before
+they are drawn, so a redraw costs the same for 10k or 10M rows. The
+matplotlib plot draws plain lines (no markers) into artists that are created
+once and updated with ``set_data``; AnalyticsWindow keeps one plot and calls
+``set_series`` for every dataset it shows and on resize. When pyqtgraph is installed the trend
+plot uses it instead; set ``EQUIPMENT_CHARTS=matplotlib`` to opt out.
+"""
+import os
+
+import numpy as np
+
+try:
+    import pyqtgraph
+except ImportError:
+    pyqtgraph = None
+
+SERIES = [('Flowrate', '#FF6384'), ('Pressure', '#36A2EB'), ('Temperature', '#FFCE56')]
+
+def minmax_decimate(x, y, width):
+    """Keep the min and max of ``y`` in each of ``width`` buckets (one per pixel)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)  # None becomes NaN, which lines skip
+    n = len(y)
+    if n <= 2 * width:
+        return x, y
+
+    size = -(-n // width)  # ceil(n / width)
+    padding = width * size - n
+    low = np.concatenate([np.where(np.isnan(y), np.inf, y), np.full(padding, np.inf)])
+    high = np.concatenate([np.where(np.isnan(y), -np.inf, y), np.full(padding, -np.inf)])
+    offsets = np.arange(width) * size
+    argmin = low.reshape(width, size).argmin(axis=1) + offsets
+    argmax = high.reshape(width, size).argmax(axis=1) + offsets
+
+    indices = np.unique(np.concatenate([argmin, argmax]))
+    indices = indices[indices < n]
+    return x[indices], y[indices]
+
+def use_pyqtgraph():
+    return pyqtgraph is not None and os.environ.get('EQUIPMENT_CHARTS') != 'matplotlib'
+
+class MatplotlibTrendPlot:
+    """Trend lines on a matplotlib ``Axes``; call ``set_series`` to update them."""
+
+    def __init__(self, ax):
+        self.ax = ax
+        self.lines = {
+            name: ax.plot([], [], '-', linewidth=1, color=color, label=name)[0]
+            for name, color in SERIES
+        }
+        ax.set_title('Parameter Trends Across Equipment')
+        ax.set_xlabel('Equipment Index')
+        ax.set_ylabel('Parameter Values')
+        ax.legend(loc='upper right')
+        ax.grid(True, alpha=0.3)
+
+    def set_series(self, series, width):
+        for name, line in self.lines.items():
+            line.set_data(*minmax_decimate(series[name]['index'], series[name]['values'], width))
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.ax.figure.canvas.draw_idle()
+
+class PyqtgraphTrendPlot:
+    """Trend lines in a pyqtgraph ``PlotWidget`` (``self.widget``)."""
+
+    def __init__(self):
+        self.widget = pyqtgraph.PlotWidget(title='Parameter Trends Across Equipment')
+        self.widget.setBackground('w')
+        self.widget.showGrid(x=True, y=True, alpha=0.3)
+        self.widget.setLabel('bottom', 'Equipment Index')
+        self.widget.setLabel('left', 'Parameter Values')
+        self.widget.addLegend()
+        # pyqtgraph also decimates on zoom
+        self.widget.setClipToView(True)
+        self.widget.setDownsampling(auto=True, mode='peak')
+        self.curves = {
+            name: self.widget.plot([], [], pen=pyqtgraph.mkPen(color, width=1), name=name,
+                                   connect='finite')
+            for name, color in SERIES
+        }
+
+    def set_series(self, series, width):
+        for name, curve in self.curves.items():
+            curve.setData(*minmax_decimate(series[name]['index'], series[name]['values'], width))
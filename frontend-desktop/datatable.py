@@ -0,0 +1,135 @@
+"""Virtualized dataset table for the desktop client.
+
+``RowsTableModel`` backs a ``QTableView`` with rows fetched page by page
+from ``/api/dataset/<id>/rows/?layout=columns``. Each page is kept as one
+NumPy array per column, and only the ``MAX_PAGES`` most recently used pages
+stay in memory; scrolling back to an evicted page fetches it again. Sorting
+and type filtering are done server-side.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+ROWS_PAGE_SIZE = 1000
+MAX_PAGES = 20
+
+class RowsTableModel(QAbstractTableModel):
+    def __init__(self, api, dataset_id, parent=None):
+        super().__init__(parent)
+        self.api = api
+        self.dataset_id = dataset_id
+        self.columns = []
+        self.sort_field = None
+        self.types = None
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        self.total = None  # unknown until the first page arrives
+        self.loaded_rows = 0
+        self.pages = OrderedDict()
+        self.requested = set()
+        self.generation += 1  # responses for an older query are dropped
+
+    def reload(self):
+        self.beginResetModel()
+        self.clear()
+        self.endResetModel()
+        self.request_page(0)
+
+    def set_types(self, types):
+        self.types = types or None
+        self.reload()
+
+    # Qt model interface
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section] if section < len(self.columns) else None
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.TextAlignmentRole):
+            return None
+        page, offset = divmod(index.row(), ROWS_PAGE_SIZE)
+        arrays = self.pages.get(page)
+        if arrays is None:
+            self.request_page(page)
+            return None
+        self.pages.move_to_end(page)
+        values = arrays[self.columns[index.column()]]
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter) if values.dtype.kind in 'iuf' else None
+        value = values[offset]
+        return '' if value is None else str(value)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.total is not None and self.loaded_rows < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.request_page(self.loaded_rows // ROWS_PAGE_SIZE)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or column >= len(self.columns):
+            return
+        field = self.columns[column]
+        sort_field = f'-{field}' if order == Qt.DescendingOrder else field
+        if sort_field != self.sort_field:
+            self.sort_field = sort_field
+            self.reload()
+
+    # Paging
+
+    def request_page(self, page):
+        if page in self.requested:
+            return
+        self.requested.add(page)
+        params = {'offset': page * ROWS_PAGE_SIZE, 'limit': ROWS_PAGE_SIZE, 'layout': 'columns'}
+        if self.sort_field:
+            params['sort'] = self.sort_field
+        if self.types:
+            params['type'] = ','.join(self.types)
+        generation = self.generation
+        self.api.submit(
+            lambda progress: self.api.get_cached_json(self.dataset_id, f'dataset/{self.dataset_id}/rows/', **params),
+            on_done=lambda data: self.page_loaded(generation, page, data),
+            on_error=lambda error: self.page_failed(generation, page, error),
+        )
+
+    def page_failed(self, generation, page, error):
+        if generation == self.generation:
+            self.requested.discard(page)
+        print(f'Failed to load rows: {error}')
+
+    def page_loaded(self, generation, page, data):
+        if generation != self.generation:
+            return
+        self.requested.discard(page)
+        if data['fields'] != self.columns:
+            self.beginResetModel()
+            self.columns = data['fields']
+            self.endResetModel()
+        self.total = data['count']
+
+        arrays = {field: np.asarray(data['columns'][field]) for field in self.columns}
+        self.pages[page] = arrays
+        while len(self.pages) > MAX_PAGES:
+            self.pages.popitem(last=False)
+
+        first = page * ROWS_PAGE_SIZE
+        last = first + len(arrays[self.columns[0]]) - 1 if self.columns else first - 1
+        if last >= self.loaded_rows:
+            self.beginInsertRows(QModelIndex(), self.loaded_rows, last)
+            self.loaded_rows = last + 1
+            self.endInsertRows()
+        elif last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.columns) - 1))
@@ -0,0 +1,110 @@
+"""On-disk cache of API responses for the desktop client.
+
+Responses are stored per dataset id as ``ds<id>-<digest>.bin``: a small
+header with the server's ETag followed by the zlib-compressed JSON body.
+Lookups revalidate with ``If-None-Match`` (a 304 costs one round trip and
+no body); entries revalidated less than ``FRESH_SECONDS`` ago in this
+session are served without a request. File modification times track use,
+and the least recently used entries are evicted once the cache grows past
+``MAX_BYTES``.
+"""
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+
+CACHE_DIR = os.environ.get('EQUIPMENT_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'), '.cache', 'equipment-analyzer'))
+MAX_BYTES = 200 * 1024 * 1024
+FRESH_SECONDS = 30
+MAGIC = b'EQC1'
+HEADER = struct.Struct('>4sH')  # magic, ETag length
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh = {}  # path -> time of the last successful validation
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, dataset_id, url, params):
+        digest = hashlib.sha1(f'{url}?{sorted(params.items())}'.encode()).hexdigest()[:20]
+        return os.path.join(self.directory, f'ds{dataset_id}-{digest}.bin')
+
+    def read(self, path):
+        """Return ``(etag, data)`` for a cache file, or None when missing or corrupt."""
+        try:
+            with open(path, 'rb') as f:
+                magic, etag_length = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC:
+                    return None
+                etag = f.read(etag_length).decode()
+                data = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, struct.error, zlib.error):
+            return None
+        os.utime(path)  # mark as recently used
+        return etag, data
+
+    def write(self, path, etag, body):
+        etag = etag.encode()
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(etag)))
+            f.write(etag)
+            f.write(zlib.compress(body))
+        os.replace(tmp_path, path)
+        self.mark_fresh(path)
+        self.evict()
+
+    def is_fresh(self, path):
+        with self.lock:
+            checked = self.fresh.get(path)
+        return checked is not None and time.monotonic() - checked < FRESH_SECONDS
+
+    def mark_fresh(self, path):
+        with self.lock:
+            self.fresh[path] = time.monotonic()
+
+    def forget_freshness(self):
+        """Revalidate everything on next use (e.g. after an upload or a new login)."""
+        with self.lock:
+            self.fresh.clear()
+
+    def entries(self):
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield name, path, stat
+
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[2].st_mtime)
+        total = sum(stat.st_size for _, _, stat in entries)
+        for _, path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= stat.st_size
+
+    def retain(self, dataset_ids):
+        """Delete the entries of datasets that are no longer in the history."""
+        keep = {f'ds{dataset_id}-' for dataset_id in dataset_ids}
+        for name, path, _ in self.entries():
+            if name[:name.index('-') + 1] not in keep:
+                self.remove(path)
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        with self.lock:
+            self.fresh.pop(path, None)
@@ -1,17 +1,29 @@
 import sys
-import requests
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import Qt
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import json
+from network import ApiClient
+from datatable import RowsTableModel
+from charts import MatplotlibTrendPlot, PyqtgraphTrendPlot, use_pyqtgraph
+
+TREND_POINTS = 1200  # roughly the trend chart width in pixels
+BREAKDOWN_METRICS = 'mean,p95,std'
+
+def fmt(value):
+    # Statistics are None for empty columns (and std below two values)
+    return 'n/a' if value is None else f'{value:.2f}'
 
 class EquipmentAnalyzer(QMainWindow):
     def __init__(self):
         super().__init__()
         self.api_base = 'http://localhost:8000/api'
-        self.auth = None
+        # Network calls run on a thread pool over one keep-alive session
+        self.api = ApiClient(self.api_base)
+        self.running_tasks = 0
+        self.analytics_window = None
         self.initUI()
         
     def initUI(self):
@@ -68,9 +80,21 @@ class EquipmentAnalyzer(QMainWindow):
         self.canvas = FigureCanvas(self.figure)
         main_layout.addWidget(self.canvas)
         
-        # Data table
-        self.table = QTableWidget()
+        # Data table; rows are paged in from the server as the view scrolls
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel('Type:'))
+        self.type_filter = QComboBox()
+        self.type_filter.currentIndexChanged.connect(self.filter_rows)
+        filter_layout.addWidget(self.type_filter)
+        filter_layout.addStretch()
+        main_layout.addLayout(filter_layout)
+        
+        self.table = QTableView()
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setDefaultSectionSize(22)
         main_layout.addWidget(self.table)
+        self.rows_model = None
         
         # History section
         history_layout = QVBoxLayout()
@@ -89,47 +113,96 @@ class EquipmentAnalyzer(QMainWindow):
         self.report_btn.clicked.connect(self.generate_report)
         history_btn_layout.addWidget(self.report_btn)
         
+        self.export_btn = QPushButton('Export All Reports')
+        self.export_btn.clicked.connect(self.export_all_reports)
+        history_btn_layout.addWidget(self.export_btn)
+        
         history_layout.addLayout(history_btn_layout)
         
         main_layout.addLayout(history_layout)
         
         layout.addWidget(self.main_widget)
         
+        # Progress of background transfers
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.progress_bar.setVisible(False)
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        
+    def run_task(self, task, on_done, error_title, message='', on_finish=None):
+        # Run task(progress) in the background; on_done gets its result on the GUI thread
+        self.running_tasks += 1
+        self.progress_bar.setRange(0, 0)  # busy until the first progress report
+        self.progress_bar.setVisible(True)
+        self.statusBar().showMessage(message)
+        
+        def finish():
+            if on_finish:
+                on_finish()
+            self.running_tasks -= 1
+            if not self.running_tasks:
+                self.progress_bar.setVisible(False)
+                self.statusBar().clearMessage()
+        
+        def done(result):
+            finish()
+            on_done(result)
+        
+        def failed(error):
+            finish()
+            QMessageBox.critical(self, 'Error', f'{error_title}: {error}')
+        
+        self.api.submit(task, on_done=done, on_error=failed, on_progress=self.show_progress)
+        
+    def show_progress(self, done, total):
+        if total:
+            # Scale to kilobytes so large files fit in the bar's int range
+            self.progress_bar.setRange(0, max(1, total // 1024))
+            self.progress_bar.setValue(done // 1024)
+        
     def login(self):
         username = self.username_input.text()
         password = self.password_input.text()
         
         if username and password:
-            self.auth = (username, password)
-            self.login_widget.setVisible(False)
-            self.main_widget.setVisible(True)
-            self.load_history()
+            # Exchange the password for a token once instead of sending it on every request
+            self.login_btn.setEnabled(False)
+            
+            def logged_in(data):
+                self.login_btn.setEnabled(True)
+                self.api.set_token(data['token'])
+                self.password_input.clear()
+                self.login_widget.setVisible(False)
+                self.main_widget.setVisible(True)
+                self.load_history()
+            
+            def failed(error):
+                self.login_btn.setEnabled(True)
+                QMessageBox.warning(self, 'Error', f'Login failed: {error}')
+            
+            self.api.submit(lambda progress: self.api.post_json('login/', {'username': username, 'password': password}),
+                            on_done=logged_in, on_error=failed)
             
     def upload_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, 'Select CSV File', '', 'CSV Files (*.csv)')
         if file_path:
-            try:
-                with open(file_path, 'rb') as f:
-                    files = {'file': f}
-                    response = requests.post(f'{self.api_base}/upload/', files=files, auth=self.auth)
-                    
-                if response.status_code == 200:
-                    data = response.json()
-                    self.display_data(data['data'], data['summary'])
-                    self.load_history()
-                else:
-                    QMessageBox.warning(self, 'Error', f'Upload failed: {response.json().get("error", "Unknown error")}')
-                    
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'Upload failed: {str(e)}')
-                
-    def display_data(self, data, summary):
+            # The file is streamed from disk; the window stays responsive meanwhile
+            def uploaded(data):
+                self.display_data(data['id'], data['summary'])
+                self.load_history()
+            
+            self.upload_btn.setEnabled(False)
+            self.run_task(lambda progress: self.api.upload('upload/', file_path, progress),
+                          uploaded, 'Upload failed', 'Uploading...',
+                          on_finish=lambda: self.upload_btn.setEnabled(True))
+        
+    def display_data(self, dataset_id, summary):
         # Update summary
         summary_text = f"""
         Total Equipment: {summary['total_count']}
-        Average Flowrate: {summary['avg_flowrate']:.2f}
-        Average Pressure: {summary['avg_pressure']:.2f}
-        Average Temperature: {summary['avg_temperature']:.2f}
+        Average Flowrate: {fmt(summary['avg_flowrate'])}
+        Average Pressure: {fmt(summary['avg_pressure'])}
+        Average Temperature: {fmt(summary['avg_temperature'])}
         """
         self.summary_label.setText(summary_text)
         
@@ -147,86 +220,112 @@ class EquipmentAnalyzer(QMainWindow):
         
         self.canvas.draw()
         
-        # Update table
-        if data:
-            self.table.setRowCount(len(data))
-            self.table.setColumnCount(5)
-            self.table.setHorizontalHeaderLabels(['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
-            
-            for i, row in enumerate(data):
-                self.table.setItem(i, 0, QTableWidgetItem(str(row['Equipment Name'])))
-                self.table.setItem(i, 1, QTableWidgetItem(str(row['Type'])))
-                self.table.setItem(i, 2, QTableWidgetItem(str(row['Flowrate'])))
-                self.table.setItem(i, 3, QTableWidgetItem(str(row['Pressure'])))
-                self.table.setItem(i, 4, QTableWidgetItem(str(row['Temperature'])))
+        # Update table; the model fetches pages itself
+        self.type_filter.blockSignals(True)
+        self.type_filter.clear()
+        self.type_filter.addItem('All types')
+        self.type_filter.addItems(types)
+        self.type_filter.blockSignals(False)
+        
+        old_model = self.rows_model
+        self.rows_model = RowsTableModel(self.api, dataset_id)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setModel(self.rows_model)
+        if old_model:
+            old_model.clear()  # drop its pages and any responses still in flight
+        self.rows_model.reload()
+        
+    def filter_rows(self, index):
+        if self.rows_model:
+            self.rows_model.set_types([self.type_filter.currentText()] if index > 0 else None)
                 
     def load_history(self):
-        try:
-            response = requests.get(f'{self.api_base}/history/', auth=self.auth)
-            if response.status_code == 200:
-                history = response.json()
-                self.history_list.clear()
-                self.history_data = {}
-                
-                for item in history:
-                    list_item = f"{item['name']} - {item['uploaded_at'][:10]}"
-                    self.history_list.addItem(list_item)
-                    self.history_data[list_item] = item['id']
-                    
-        except Exception as e:
-            print(f'Failed to load history: {e}')
+        self.api.submit(lambda progress: self.api.get_json('history/'), on_done=self.show_history,
+                        on_error=lambda error: print(f'Failed to load history: {error}'))
+            
+    def show_history(self, history):
+        self.history_list.clear()
+        self.history_data = {}
+        self.history_summaries = {}
+        
+        for item in history:
+            list_item = f"{item['name']} - {item['uploaded_at'][:10]}"
+            self.history_list.addItem(list_item)
+            self.history_data[list_item] = item['id']
+            self.history_summaries[item['id']] = item['summary']
+        
+        # Pruned datasets will not be requested again
+        self.api.cache.retain(self.history_summaries.keys())
             
     def load_dataset(self, item):
         dataset_id = self.history_data[item.text()]
-        try:
-            response = requests.get(f'{self.api_base}/dataset/{dataset_id}/', auth=self.auth)
-            if response.status_code == 200:
-                data = response.json()
-                self.display_data(data['data'], data['summary'])
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to load dataset: {str(e)}')
+        self.display_data(dataset_id, self.history_summaries[dataset_id])
             
     def view_analytics(self):
         current_item = self.history_list.currentItem()
         if current_item:
-            dataset_id = self.history_data[current_item.text()]
-            try:
-                response = requests.get(f'{self.api_base}/dataset/{dataset_id}/', auth=self.auth)
-                if response.status_code == 200:
-                    data = response.json()
-                    self.show_analytics_window(data)
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'Failed to load analytics: {str(e)}')
+            self.load_analytics(self.history_data[current_item.text()])
         else:
             QMessageBox.warning(self, 'Warning', 'Please select a dataset from history first.')
             
-    def show_analytics_window(self, data):
-        analytics_window = AnalyticsWindow(data, self)
-        analytics_window.exec_()
+    def load_analytics(self, dataset_id):
+        # Cached on disk; reopening a dataset costs at most three 304s
+        def task(progress):
+            data = self.api.get_cached_json(dataset_id, f'dataset/{dataset_id}/')
+            data['trends'] = self.api.get_cached_json(dataset_id, f'dataset/{dataset_id}/trends/',
+                                                      points=TREND_POINTS)
+            # Per-type statistics are aggregated server-side; no rows are downloaded
+            data['by_type'] = self.api.get_cached_json(dataset_id, f'dataset/{dataset_id}/groupby/',
+                                                       by='Type', metrics=BREAKDOWN_METRICS)
+            return data
+        
+        self.run_task(task, lambda data: self.show_analytics_window(dataset_id, data),
+                      'Failed to load analytics')
+            
+    def show_analytics_window(self, dataset_id, data):
+        # One window for every dataset, so its chart artists are updated in place
+        if self.analytics_window is None:
+            self.analytics_window = AnalyticsWindow(self.load_analytics, self)
+        self.analytics_window.set_data(dataset_id, data)
+        self.analytics_window.show()
+        self.analytics_window.raise_()
+        self.analytics_window.activateWindow()
             
     def generate_report(self):
         current_item = self.history_list.currentItem()
         if current_item:
             dataset_id = self.history_data[current_item.text()]
-            try:
-                response = requests.post(f'{self.api_base}/report/', 
-                                       json={'dataset_id': dataset_id}, 
-                                       auth=self.auth)
-                
-                if response.status_code == 200:
-                    file_path, _ = QFileDialog.getSaveFileName(self, 'Save Report', 'report.pdf', 'PDF Files (*.pdf)')
-                    if file_path:
-                        with open(file_path, 'wb') as f:
-                            f.write(response.content)
-                        QMessageBox.information(self, 'Success', 'Report generated successfully!')
-                        
-            except Exception as e:
-                QMessageBox.critical(self, 'Error', f'Report generation failed: {str(e)}')
+            file_path, _ = QFileDialog.getSaveFileName(self, 'Save Report', 'report.pdf', 'PDF Files (*.pdf)')
+            if file_path:
+                # Rendered server-side, then streamed straight to file_path
+                self.run_task(
+                    lambda progress: self.api.download('report/', file_path, {'dataset_id': dataset_id}, progress),
+                    lambda path: QMessageBox.information(self, 'Success', 'Report generated successfully!'),
+                    'Report generation failed', 'Generating report...'
+                )
+
+    def export_all_reports(self):
+        dataset_ids = list(self.history_data.values()) if getattr(self, 'history_data', None) else []
+        if not dataset_ids:
+            QMessageBox.warning(self, 'Warning', 'No datasets in history to export.')
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, 'Save Reports', 'reports.zip', 'ZIP Files (*.zip)')
+        if file_path:
+            # One batch request renders every report server-side and returns a ZIP
+            self.run_task(
+                lambda progress: self.api.download('report/batch/', file_path, {'dataset_ids': dataset_ids}, progress),
+                lambda path: QMessageBox.information(self, 'Success', 'Reports exported successfully!'),
+                'Report export failed', 'Exporting reports...'
+            )
 
 class AnalyticsWindow(QDialog):
-    def __init__(self, data, parent=None):
+    # Shows one dataset at a time: the widgets and trend artists are built
+    # once and set_data updates them when a dataset is re-opened or refreshed
+    def __init__(self, reload, parent=None):
         super().__init__(parent)
-        self.data = data
+        self.reload = reload  # reload(dataset_id) fetches the data again
+        self.dataset_id = None
+        self.data = {}
         self.initUI()
         
     def initUI(self):
@@ -242,60 +341,86 @@ class AnalyticsWindow(QDialog):
         title.setStyleSheet('font-size: 18px; font-weight: bold; margin: 10px;')
         layout.addWidget(title)
         
-        # Statistics section
-        stats_widget = QWidget()
+        # Statistics section: one label per parameter
+        self.stats_widget = QWidget()
         stats_layout = QHBoxLayout()
-        stats_widget.setLayout(stats_layout)
-        
-        if 'analytics' in self.data:
-            analytics = self.data['analytics']
-            
-            # Flowrate stats
-            flowrate_stats = QLabel(f"""
-            Flowrate Statistics:
-            Min: {analytics['statistics']['flowrate_stats']['min']:.2f}
-            Max: {analytics['statistics']['flowrate_stats']['max']:.2f}
-            Mean: {analytics['statistics']['flowrate_stats']['mean']:.2f}
-            Std: {analytics['statistics']['flowrate_stats']['std']:.2f}
-            """)
-            flowrate_stats.setStyleSheet('border: 1px solid gray; padding: 10px; margin: 5px;')
-            stats_layout.addWidget(flowrate_stats)
-            
-            # Pressure stats
-            pressure_stats = QLabel(f"""
-            Pressure Statistics:
-            Min: {analytics['statistics']['pressure_stats']['min']:.2f}
-            Max: {analytics['statistics']['pressure_stats']['max']:.2f}
-            Mean: {analytics['statistics']['pressure_stats']['mean']:.2f}
-            Std: {analytics['statistics']['pressure_stats']['std']:.2f}
-            """)
-            pressure_stats.setStyleSheet('border: 1px solid gray; padding: 10px; margin: 5px;')
-            stats_layout.addWidget(pressure_stats)
-            
-            # Temperature stats
-            temp_stats = QLabel(f"""
-            Temperature Statistics:
-            Min: {analytics['statistics']['temperature_stats']['min']:.2f}
-            Max: {analytics['statistics']['temperature_stats']['max']:.2f}
-            Mean: {analytics['statistics']['temperature_stats']['mean']:.2f}
-            Std: {analytics['statistics']['temperature_stats']['std']:.2f}
-            """)
-            temp_stats.setStyleSheet('border: 1px solid gray; padding: 10px; margin: 5px;')
-            stats_layout.addWidget(temp_stats)
-            
-        layout.addWidget(stats_widget)
-        
-        # Charts section
-        self.figure = Figure(figsize=(12, 8))
+        self.stats_widget.setLayout(stats_layout)
+        self.stats_labels = {}
+        for name in ('Flowrate', 'Pressure', 'Temperature'):
+            label = QLabel()
+            label.setStyleSheet('border: 1px solid gray; padding: 10px; margin: 5px;')
+            stats_layout.addWidget(label)
+            self.stats_labels[name] = label
+        layout.addWidget(self.stats_widget)
+        
+        self.breakdown_table = QTableWidget()
+        self.breakdown_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.breakdown_table.verticalHeader().setVisible(False)
+        self.breakdown_table.setMaximumHeight(200)
+        layout.addWidget(self.breakdown_table)
+        
+        # Charts section: type distribution in one figure, trends in their own plot
+        # so updating the trends never redraws the bar and pie charts
+        self.figure = Figure(figsize=(12, 4))
         self.canvas = FigureCanvas(self.figure)
         layout.addWidget(self.canvas)
         
-        self.create_charts()
-        
-        # Close button
+        if use_pyqtgraph():
+            self.trend_plot = PyqtgraphTrendPlot()
+            layout.addWidget(self.trend_plot.widget)
+        else:
+            trend_figure = Figure(figsize=(12, 4))
+            self.trend_canvas = FigureCanvas(trend_figure)
+            layout.addWidget(self.trend_canvas)
+            self.trend_plot = MatplotlibTrendPlot(trend_figure.add_subplot(111))
+        
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton('Refresh')
+        refresh_btn.clicked.connect(lambda: self.reload(self.dataset_id))
+        buttons.addWidget(refresh_btn)
         close_btn = QPushButton('Close')
         close_btn.clicked.connect(self.close)
-        layout.addWidget(close_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+    def set_data(self, dataset_id, data):
+        self.dataset_id = dataset_id
+        self.data = data
+        
+        self.stats_widget.setVisible('analytics' in data)
+        if 'analytics' in data:
+            for name, label in self.stats_labels.items():
+                stats = data['analytics']['statistics'][f'{name.lower()}_stats']
+                label.setText(f"""
+            {name} Statistics:
+            Min: {fmt(stats['min'])}
+            Max: {fmt(stats['max'])}
+            Mean: {fmt(stats['mean'])}
+            Std: {fmt(stats['std'])}
+            """)
+        
+        self.breakdown_table.setVisible('by_type' in data)
+        if 'by_type' in data:
+            self.fill_breakdown_table(data['by_type'])
+        
+        self.create_charts()
+        self.update_trends()
+        
+    def fill_breakdown_table(self, by_type):
+        # One row per type; columns are rows plus each field/metric pair
+        table = self.breakdown_table
+        columns = [(field, metric) for field in by_type['fields'] for metric in by_type['metrics']]
+        table.clearContents()
+        table.setRowCount(len(by_type['groups']))
+        table.setColumnCount(len(columns) + 2)
+        table.setHorizontalHeaderLabels(['Type', 'Rows'] + [f'{field} {metric}' for field, metric in columns])
+        for row, group in enumerate(by_type['groups']):
+            table.setItem(row, 0, QTableWidgetItem(group or ''))
+            table.setItem(row, 1, QTableWidgetItem(str(by_type['rows'][row])))
+            for col, (field, metric) in enumerate(columns, start=2):
+                value = by_type['values'][field][metric][row]
+                table.setItem(row, col, QTableWidgetItem('' if value is None else fmt(value)))
+        table.resizeColumnsToContents()
         
     def create_charts(self):
         self.figure.clear()
@@ -304,9 +429,8 @@ class AnalyticsWindow(QDialog):
             analytics = self.data['analytics']
             
             # Create subplots
-            ax1 = self.figure.add_subplot(2, 2, 1)
-            ax2 = self.figure.add_subplot(2, 2, 2)
-            ax3 = self.figure.add_subplot(2, 1, 2)
+            ax1 = self.figure.add_subplot(1, 2, 1)
+            ax2 = self.figure.add_subplot(1, 2, 2)
             
             # Equipment type distribution (bar)
             types = list(analytics['type_distribution'].keys())
@@ -321,24 +445,18 @@ class AnalyticsWindow(QDialog):
                    colors=['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF'])
             ax2.set_title('Equipment Type Distribution')
             
-            # Parameter trends
-            equipment_names = analytics['parameter_trends']['equipment_names']
-            flowrates = analytics['parameter_trends']['flowrates']
-            pressures = analytics['parameter_trends']['pressures']
-            temperatures = analytics['parameter_trends']['temperatures']
-            
-            x_pos = range(len(equipment_names))
-            ax3.plot(x_pos, flowrates, 'o-', label='Flowrate', color='#FF6384')
-            ax3.plot(x_pos, pressures, 's-', label='Pressure', color='#36A2EB')
-            ax3.plot(x_pos, temperatures, '^-', label='Temperature', color='#FFCE56')
-            ax3.set_title('Parameter Trends Across Equipment')
-            ax3.set_xlabel('Equipment Index')
-            ax3.set_ylabel('Parameter Values')
-            ax3.legend()
-            ax3.grid(True, alpha=0.3)
-            
             self.figure.tight_layout()
-            self.canvas.draw()
+        self.canvas.draw()
+        
+    def update_trends(self):
+        # Parameter trends (downsampled server-side, decimated again to the plot width)
+        if 'trends' in self.data:
+            self.trend_plot.set_series(self.data['trends']['series'], max(100, self.width()))
+        
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Same artists, re-decimated for the new width
+        self.update_trends()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
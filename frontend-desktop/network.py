@@ -0,0 +1,199 @@
+"""Background HTTP for the desktop client.
+
+Every API call goes through one ``ApiClient``: a pooled ``requests.Session``
+(connections are kept alive between calls) whose requests run on the global
+``QThreadPool``, so the GUI thread never blocks. Results, errors and
+upload/download progress come back as Qt signals, delivered on the GUI
+thread. Uploads are streamed from disk as the raw request body. Dataset
+responses go through the on-disk ``ResponseCache`` with ETag revalidation.
+"""
+import os
+import time
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from diskcache import ResponseCache
+
+POOL_SIZE = 4
+CHUNK_SIZE = 64 * 1024
+JOB_POLL_WAIT = 10  # seconds per long-poll; polling runs off the GUI thread
+JOB_MAX_WAIT = 20 * 60  # give up on a job after this many seconds
+PROGRESS_STEPS = 200  # progress signals per transfer at most
+
+class TokenAuth(requests.auth.AuthBase):
+    def __init__(self, token):
+        self.token = token
+
+    def __call__(self, request):
+        request.headers['Authorization'] = f'Token {self.token}'
+        return request
+
+class ApiError(Exception):
+    def __init__(self, response):
+        try:
+            message = response.json().get('error') or response.json().get('detail')
+        except ValueError:
+            message = None
+        super().__init__(message or f'HTTP {response.status_code}')
+        self.status_code = response.status_code
+
+class ProgressReader:
+    """Read-only file wrapper that reports how many bytes have been sent.
+
+    It has a length but no ``__iter__``, so ``requests`` sends it with a
+    Content-Length and reads it block by block instead of loading it.
+    """
+
+    def __init__(self, path, progress=None):
+        self.file = open(path, 'rb')
+        self.total = os.path.getsize(path)
+        self.sent = 0
+        self.reported = 0
+        self.progress = progress
+
+    def __len__(self):
+        return self.total
+
+    def read(self, size=-1):
+        chunk = self.file.read(size)
+        self.sent += len(chunk)
+        if chunk and self.progress and (self.sent - self.reported >= self.total / PROGRESS_STEPS or self.sent == self.total):
+            self.reported = self.sent
+            self.progress(self.sent, self.total)
+        return chunk
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    progress = pyqtSignal(int, int)
+
+class Worker(QRunnable):
+    """Runs ``task(progress)`` on a pool thread and reports through signals."""
+
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.task(self.signals.progress.emit)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+class ApiClient:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool = QThreadPool.globalInstance()
+        self.pool.setMaxThreadCount(POOL_SIZE)
+        self.pending = set()
+        self.cache = ResponseCache()
+
+    def set_token(self, token):
+        self.session.auth = TokenAuth(token) if token else None
+        self.cache.forget_freshness()
+
+    def submit(self, task, on_done=None, on_error=None, on_progress=None):
+        """Run ``task(progress)`` in the background; callbacks run on the GUI thread."""
+        worker = Worker(task)
+        signals = worker.signals
+        # Keep the signals alive until they have been delivered
+        self.pending.add(signals)
+        signals.finished.connect(lambda _: self.pending.discard(signals))
+        signals.failed.connect(lambda _: self.pending.discard(signals))
+        if on_done:
+            signals.finished.connect(on_done)
+        if on_error:
+            signals.failed.connect(on_error)
+        if on_progress:
+            signals.progress.connect(on_progress)
+        self.pool.start(worker)
+
+    # The methods below block; call them from tasks passed to submit()
+
+    def request(self, method, path, **kwargs):
+        response = self.session.request(method, f'{self.base_url}/{path}', **kwargs)
+        if response.status_code >= 400:
+            raise ApiError(response)
+        return response
+
+    def get_json(self, path, **params):
+        return self.request('GET', path, params=params).json()
+
+    def get_cached_json(self, dataset_id, path, **params):
+        """GET a response about ``dataset_id``, served from or stored in the disk cache."""
+        cache_path = self.cache.path(dataset_id, path, params)
+        entry = self.cache.read(cache_path)
+        if entry and self.cache.is_fresh(cache_path):
+            return entry[1]
+        headers = {'If-None-Match': entry[0]} if entry else {}
+        response = self.request('GET', path, params=params, headers=headers)
+        if response.status_code == 304 and entry:
+            self.cache.mark_fresh(cache_path)
+            return entry[1]
+        if response.headers.get('ETag'):
+            self.cache.write(cache_path, response.headers['ETag'], response.content)
+        return response.json()
+
+    def post_json(self, path, payload):
+        return self.request('POST', path, json=payload).json()
+
+    def wait_for_job(self, response, stream=False):
+        # Uploads and reports are queued server-side (202); long-poll until the job finishes
+        if response.status_code != 202:
+            return response
+        job_id = response.json()['job_id']
+        deadline = time.monotonic() + JOB_MAX_WAIT
+        while True:
+            job = self.get_json(f'jobs/{job_id}/', wait=JOB_POLL_WAIT)
+            if job['status'] in ('succeeded', 'failed'):
+                break
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'Job {job_id} did not finish within {JOB_MAX_WAIT // 60} minutes')
+        return self.request('GET', f'jobs/{job_id}/result/', stream=stream)
+
+    def upload(self, path, file_path, progress=None):
+        """Stream ``file_path`` to ``path`` and return the JSON result."""
+        name = os.path.basename(file_path)
+        headers = {
+            'Content-Type': 'text/csv',
+            'Content-Disposition': f"attachment; filename*=utf-8''{quote(name)}",
+        }
+        with ProgressReader(file_path, progress) as body:
+            response = self.request('POST', path, data=body, headers=headers)
+        result = self.wait_for_job(response).json()
+        # The server bumps every ETag of this user on upload; skip the stale fast path
+        self.cache.forget_freshness()
+        return result
+
+    def download(self, path, target, payload, progress=None):
+        """POST ``payload`` to ``path`` and stream the resulting file to ``target``."""
+        response = self.wait_for_job(self.request('POST', path, json=payload, stream=True), stream=True)
+        total = int(response.headers.get('Content-Length') or 0)
+        received = 0
+        tmp_path = f'{target}.part'
+        with response, open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                received += len(chunk)
+                if progress:
+                    progress(received, total)
+        os.replace(tmp_path, target)
+        return target
@@ -7,17 +7,25 @@ import './App.css';
 ChartJS.register(CategoryScale, LinearScale, BarElement, LineElement, PointElement, Title, Tooltip, Legend, ArcElement);
 
 const API_BASE = 'http://localhost:8000/api';
+const ROWS_PAGE_SIZE = 1000;
+const TREND_POINTS = 1200;
+const JOB_POLL_WAIT = 25;
+const JOB_MAX_WAIT_MS = 20 * 60 * 1000;
 
 function App() {
   const [data, setData] = useState([]);
   const [summary, setSummary] = useState(null);
   const [history, setHistory] = useState([]);
   const [auth, setAuth] = useState({ username: '', password: '' });
+  const [token, setToken] = useState(null);
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [showRegister, setShowRegister] = useState(null);
   const [registerData, setRegisterData] = useState({ username: '', password: '', email: '' });
   const [selectedHistoryItem, setSelectedHistoryItem] = useState(null);
   const [historyAnalytics, setHistoryAnalytics] = useState(null);
+  const [rowsPage, setRowsPage] = useState(null);
+  const [historyTrends, setHistoryTrends] = useState(null);
+  const [trends, setTrends] = useState(null);
 
 
   const login = async () => {
@@ -26,8 +34,10 @@ function App() {
         username: auth.username,
         password: auth.password
       });
+      setToken(response.data.token);
+      setAuth({ ...auth, password: '' });
       setIsAuthenticated(true);
-      loadHistory();
+      loadHistory({ Authorization: `Token ${response.data.token}` });
     } catch (error) {
       alert('Login failed: ' + (error.response?.data?.error || 'Invalid credentials'));
     }
@@ -44,14 +54,42 @@ function App() {
     }
   };
 
+  const authHeaders = { Authorization: `Token ${token}` };
+
   const logout = () => {
+    axios.post(`${API_BASE}/logout/`, {}, { headers: authHeaders }).catch(() => {});
+    setToken(null);
     setIsAuthenticated(false);
     setAuth({ username: '', password: '' });
     setData([]);
+    setRowsPage(null);
+    setTrends(null);
     setSummary(null);
     setHistory([]);
   };
 
+  // Uploads and reports are queued server-side (202); long-poll the job, then fetch its result
+  const waitForJob = async (response, resultConfig = {}) => {
+    if (response.status !== 202) return response;
+    const accepted = response.data instanceof Blob ? JSON.parse(await response.data.text()) : response.data;
+    let job = { status: accepted.status };
+    const deadline = Date.now() + JOB_MAX_WAIT_MS;
+    while (job.status !== 'succeeded' && job.status !== 'failed') {
+      if (Date.now() >= deadline) {
+        // Shaped like an axios error so callers can show error.response.data.error
+        const error = new Error('The job did not finish in time');
+        error.response = { data: { error: error.message } };
+        throw error;
+      }
+      const poll = await axios.get(`${API_BASE}/jobs/${accepted.job_id}/`, {
+        headers: authHeaders,
+        params: { wait: JOB_POLL_WAIT }
+      });
+      job = poll.data;
+    }
+    return axios.get(`${API_BASE}/jobs/${accepted.job_id}/result/`, { headers: authHeaders, ...resultConfig });
+  };
+
   const uploadFile = async (event) => {
     const file = event.target.files[0];
     if (!file) return;
@@ -60,21 +98,49 @@ function App() {
     formData.append('file', file);
 
     try {
-      const response = await axios.post(`${API_BASE}/upload/`, formData, {
-        auth: { username: auth.username, password: auth.password }
-      });
-      setData(response.data.data);
+      const response = await waitForJob(await axios.post(`${API_BASE}/upload/`, formData, {
+        headers: authHeaders
+      }));
       setSummary(response.data.summary);
+      loadRows(response.data.id);
+      loadTrends(response.data.id);
       loadHistory();
     } catch (error) {
       alert('Upload failed: ' + error.response?.data?.error);
     }
   };
 
-  const loadHistory = async () => {
+  const loadRows = async (datasetId, offset = 0) => {
+    try {
+      const response = await axios.get(`${API_BASE}/dataset/${datasetId}/rows/`, {
+        headers: authHeaders,
+        params: { offset, limit: ROWS_PAGE_SIZE }
+      });
+      const page = response.data;
+      setData(previous => offset === 0 ? page.results : [...previous, ...page.results]);
+      setRowsPage({ datasetId, count: page.count, nextOffset: page.next_offset });
+    } catch (error) {
+      console.error('Failed to load rows');
+    }
+  };
+
+  // Downsampled server-side, so the chart stays the same size however many rows are loaded
+  const loadTrends = async (datasetId) => {
+    try {
+      const response = await axios.get(`${API_BASE}/dataset/${datasetId}/trends/`, {
+        headers: authHeaders,
+        params: { points: TREND_POINTS }
+      });
+      setTrends(response.data.series);
+    } catch (error) {
+      console.error('Failed to load trends');
+    }
+  };
+
+  const loadHistory = async (headers = authHeaders) => {
     try {
       const response = await axios.get(`${API_BASE}/history/`, {
-        auth: { username: auth.username, password: auth.password }
+        headers
       });
       setHistory(response.data);
     } catch (error) {
@@ -84,13 +150,13 @@ function App() {
 
   const generateReport = async (datasetId) => {
     try {
-      const response = await axios.post(`${API_BASE}/report/`, 
+      const response = await waitForJob(await axios.post(`${API_BASE}/report/`, 
         { dataset_id: datasetId },
         { 
-          auth: { username: auth.username, password: auth.password },
+          headers: authHeaders,
           responseType: 'blob'
         }
-      );
+      ), { responseType: 'blob' });
       const url = window.URL.createObjectURL(new Blob([response.data]));
       const link = document.createElement('a');
       link.href = url;
@@ -102,15 +168,42 @@ function App() {
     }
   };
 
+  const exportAllReports = async () => {
+    try {
+      const response = await waitForJob(await axios.post(`${API_BASE}/report/batch/`,
+        { dataset_ids: history.map(item => item.id) },
+        {
+          headers: authHeaders,
+          responseType: 'blob'
+        }
+      ), { responseType: 'blob' });
+      const url = window.URL.createObjectURL(new Blob([response.data]));
+      const link = document.createElement('a');
+      link.href = url;
+      link.setAttribute('download', 'reports.zip');
+      document.body.appendChild(link);
+      link.click();
+    } catch (error) {
+      alert('Report export failed');
+    }
+  };
+
   const viewHistoryAnalytics = async (datasetId) => {
     try {
-      const response = await axios.get(`${API_BASE}/dataset/${datasetId}/`, {
-        auth: { username: auth.username, password: auth.password }
-      });
+      const [response, trends] = await Promise.all([
+        axios.get(`${API_BASE}/dataset/${datasetId}/`, {
+          headers: authHeaders
+        }),
+        axios.get(`${API_BASE}/dataset/${datasetId}/trends/`, {
+          headers: authHeaders,
+          params: { points: TREND_POINTS }
+        })
+      ]);
       setSelectedHistoryItem(datasetId);
       setHistoryAnalytics(response.data.analytics);
-      setData(response.data.data);
+      setHistoryTrends(trends.data.series);
       setSummary(response.data.summary);
+      loadRows(datasetId);
     } catch (error) {
       alert('Failed to load analytics');
     }
@@ -119,7 +212,10 @@ function App() {
   const closeHistoryAnalytics = () => {
     setSelectedHistoryItem(null);
     setHistoryAnalytics(null);
+    setHistoryTrends(null);
+    setTrends(null);
     setData([]);
+    setRowsPage(null);
     setSummary(null);
   };
 
@@ -142,32 +238,52 @@ function App() {
     }]
   } : null;
 
-  const lineChartData = data.length > 0 ? {
-    labels: data.map(item => item['Equipment Name']),
+  const trendPoints = (series) => series.index.map((x, i) => ({ x, y: series.values[i] }));
+
+  const trendChartData = (series) => ({
     datasets: [
       {
         label: 'Flowrate',
-        data: data.map(item => item.Flowrate),
+        data: trendPoints(series.Flowrate),
         borderColor: '#FF6384',
         backgroundColor: 'rgba(255, 99, 132, 0.2)',
+        pointRadius: 0,
         tension: 0.1
       },
       {
         label: 'Pressure',
-        data: data.map(item => item.Pressure),
+        data: trendPoints(series.Pressure),
         borderColor: '#36A2EB',
         backgroundColor: 'rgba(54, 162, 235, 0.2)',
+        pointRadius: 0,
         tension: 0.1
       },
       {
         label: 'Temperature',
-        data: data.map(item => item.Temperature),
+        data: trendPoints(series.Temperature),
         borderColor: '#FFCE56',
         backgroundColor: 'rgba(255, 206, 86, 0.2)',
+        pointRadius: 0,
         tension: 0.1
       }
     ]
-  } : null;
+  });
+
+  const trendChartOptions = {
+    responsive: true,
+    maintainAspectRatio: false,
+    scales: {
+      x: {
+        type: 'linear',
+        title: { display: true, text: 'Equipment Index' }
+      },
+      y: {
+        beginAtZero: true
+      }
+    }
+  };
+
+  const lineChartData = trends ? trendChartData(trends) : null;
 
   if (!isAuthenticated) {
     return (
@@ -304,15 +420,7 @@ function App() {
           {lineChartData && (
             <div className="chart-wide">
               <h3>Equipment Parameters Comparison</h3>
-              <Line data={lineChartData} options={{
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                  y: {
-                    beginAtZero: true
-                  }
-                }
-              }} />
+              <Line data={lineChartData} options={trendChartOptions} />
             </div>
           )}
         </div>
@@ -343,12 +451,21 @@ function App() {
               ))}
             </tbody>
           </table>
+          {rowsPage && (
+            <div className="rows-pager">
+              <small>Showing {data.length} of {rowsPage.count} rows</small>
+              {rowsPage.nextOffset !== null && (
+                <button onClick={() => loadRows(rowsPage.datasetId, rowsPage.nextOffset)}>Load More Rows</button>
+              )}
+            </div>
+          )}
         </div>
       )}
 
       {history.length > 0 && (
         <div className="history">
           <h3>Upload History</h3>
+          <button onClick={exportAllReports}>Export All Reports</button>
           {history.map((item) => (
             <div key={item.id} className="history-item">
               <div className="history-info">
@@ -365,7 +482,7 @@ function App() {
           ))}
         </div>
       )}
-      {selectedHistoryItem && historyAnalytics && (
+      {selectedHistoryItem && historyAnalytics && historyTrends && (
         <div className="history-analytics">
           <div className="analytics-header">
             <h3>Analytics for Selected Dataset</h3>
@@ -425,40 +542,7 @@ function App() {
             
             <div className="chart-wide">
               <h4>Parameter Trends</h4>
-              <Line data={{
-                labels: historyAnalytics.parameter_trends.equipment_names,
-                datasets: [
-                  {
-                    label: 'Flowrate',
-                    data: historyAnalytics.parameter_trends.flowrates,
-                    borderColor: '#FF6384',
-                    backgroundColor: 'rgba(255, 99, 132, 0.2)',
-                    tension: 0.1
-                  },
-                  {
-                    label: 'Pressure',
-                    data: historyAnalytics.parameter_trends.pressures,
-                    borderColor: '#36A2EB',
-                    backgroundColor: 'rgba(54, 162, 235, 0.2)',
-                    tension: 0.1
-                  },
-                  {
-                    label: 'Temperature',
-                    data: historyAnalytics.parameter_trends.temperatures,
-                    borderColor: '#FFCE56',
-                    backgroundColor: 'rgba(255, 206, 86, 0.2)',
-                    tension: 0.1
-                  }
-                ]
-              }} options={{
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                  y: {
-                    beginAtZero: true
-                  }
-                }
-              }} />
+              <Line data={trendChartData(historyTrends)} options={trendChartOptions} />
             </div>
           </div>
         </div>
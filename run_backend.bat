@@ -22,6 +22,9 @@ echo.
 echo Press Ctrl+C to stop the server
 echo.
 
+REM Start the background job worker (uploads and PDF reports) in its own window
+start "Equipment Analyzer job worker" python manage.py run_jobs
+
 REM Start Django server on default port 8000
 python manage.py runserver
 